@@ -1,8 +1,10 @@
 """BYO ADK agent that discovers, deploys, and uses MCP servers on-demand.
 
-The agent connects to AgentRegistry via a static MCP toolset for catalog
-search and deployment.  After deploying a server it reaches it through
-custom Python tools that open ad-hoc MCP sessions to the new Service.
+The agent searches a local, synced index of the AgentRegistry catalog and
+connects to AgentRegistry via a static MCP toolset for server details.
+Deployments go through a warm pool that keeps popular servers running.
+Remote and deployed servers alike are reached through custom Python tools
+that reuse pooled MCP sessions per endpoint (see ``sessions.py``).
 """
 
 from __future__ import annotations
@@ -14,7 +16,16 @@ from google.adk.models.lite_llm import LiteLlm
 from google.adk.tools.mcp_tool import StreamableHTTPConnectionParams
 from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
 
-from .tools import call_mcp_tool, list_server_tools
+from .tools import (
+    call_mcp_tool,
+    call_mcp_tools_batch,
+    deploy_server,
+    get_endpoint_health,
+    list_server_tools,
+    read_tool_result,
+    search_catalog,
+)
+from .warmpool import REGISTRY_MCP_URL
 
 # ---------------------------------------------------------------------------
 # LLM — Claude via AgentGateway proxy
@@ -30,20 +41,16 @@ model = LiteLlm(
 )
 
 # ---------------------------------------------------------------------------
-# Static MCP connection — AgentRegistry (catalog search + deploy)
+# Static MCP connection — AgentRegistry (catalog search + server details)
 # ---------------------------------------------------------------------------
 registry_mcp = McpToolset(
     connection_params=StreamableHTTPConnectionParams(
-        url=os.environ.get(
-            "REGISTRY_MCP_URL",
-            "http://agentregistry.agentregistry.svc.cluster.local:8090/mcp",
-        ),
+        url=REGISTRY_MCP_URL,
     ),
     tool_filter=[
         "list_servers",
         "get_server",
         "get_server_readme",
-        "deploy_server",
     ],
 )
 
@@ -68,40 +75,64 @@ The registry contains two kinds of servers:
 When a user asks you to do something and you don't already have the right tool:
 
 1. **Search** the catalog:
-   Call `list_servers` with a relevant search query.
-   Set `semantic=true` for natural-language queries.
+   Call `search_catalog` with a few keywords describing the capability.
+   It answers from a local index and returns compact summaries.
+   Only if it returns an error or nothing relevant, call `list_servers`
+   (set `semantic=true` for natural-language queries).
 
 2. **Inspect** the result:
-   Call `get_server` to see the full server details.
-   - If the server has a `remotes` array with a URL → it is a **remote** server.
-   - If it only has `packages` → it is a **stdio** server that needs deployment.
+   - `kind: "remote"` with a `url` → a **remote** server; use the `url` as is.
+   - `kind: "stdio"` → a **stdio** server that needs deployment. Its
+     `required_env` lists config it needs.
+   Call `get_server` only when you need details the summary lacks.
 
-3a. **Remote servers** (has `remotes` URL):
+3a. **Remote servers** (`kind: "remote"`, with a `url`):
    - Skip deployment — the server is already running.
-   - Call `list_server_tools(url="<the remote URL>")` to discover tools.
-   - Call `call_mcp_tool(tool_name=..., arguments=..., url="<the remote URL>")`
+   - Call `list_server_tools(url="<the url>")` to discover tools.
+   - Call `call_mcp_tool(tool_name=..., arguments=..., url="<the url>")`
      to call a tool.
 
-3b. **Stdio servers** (needs deployment):
+3b. **Stdio servers** (`kind: "stdio"`, needs deployment):
    - Optionally read the README: `get_server_readme` to check required config.
-   - Deploy: `deploy_server` with the server name, version ("latest" if unsure),
-     and **always set `runtime` to `"kubernetes"`**.
+   - Deploy: `deploy_server` with the server name and version ("latest" if unsure).
      Pass `config` if the README says API keys or settings are needed.
+     Popular servers are kept running; `warm: true` means it was already up.
    - List tools: `list_server_tools(server_name="<exact name from deploy_server>")`.
-     The server needs 30-60 s to start — the function retries automatically.
+     A new server needs 30-60 s to start — the function waits until it is ready.
    - Call a tool: `call_mcp_tool(tool_name=..., arguments=..., server_name="<name>")`.
 
 ## Important notes
 
-- **Always pass `runtime: "kubernetes"` to `deploy_server`.**  The default is
-  "local" (Docker Compose), which does not work in this environment.
 - Prefer remote servers when available — they're instantly usable, no deploy needed.
+- When several servers could do the job, call `get_endpoint_health` and prefer
+  endpoints whose `state` is `closed` with a low `error_rate`. An error saying
+  an endpoint is "failing fast" means it is known to be down; pick another
+  server instead of retrying.
 - For `list_server_tools` / `call_mcp_tool`, pass EITHER `url` (remote) or
   `server_name` (deployed), never both.
-- After `deploy_server`, allow the pod time to start. If `list_server_tools`
-  returns an error, wait and retry.
+- When you need several independent tool calls (the same tool with different
+  arguments, or one question to several servers), make them in one
+  `call_mcp_tools_batch(calls=[{"tool_name": ..., "arguments": ..., "url": ...}, ...])`
+  call instead of one `call_mcp_tool` per turn. Each entry takes `url` or
+  `server_name` like `call_mcp_tool`; failed entries carry an `error`.
+- Large tool results are truncated. If a result has a `truncated` entry and
+  you need the rest, call `read_tool_result(result_id=...)` and follow its
+  `next` values (`item`, `offset`) until there is no `next`.
+- `list_server_tools` results are cached per server. Pass `refresh=true` only
+  if a server was just redeployed or its tools seem out of date.
+- After `deploy_server`, call `list_server_tools` right away; it waits for the
+  pod to start. If it still returns a "not ready" error, wait and retry.
 - Some servers require configuration (API keys, tokens). Always check the
   server details or README first.
 """,
-    tools=[registry_mcp, list_server_tools, call_mcp_tool],
+    tools=[
+        registry_mcp,
+        search_catalog,
+        deploy_server,
+        list_server_tools,
+        call_mcp_tool,
+        call_mcp_tools_batch,
+        read_tool_result,
+        get_endpoint_health,
+    ],
 )
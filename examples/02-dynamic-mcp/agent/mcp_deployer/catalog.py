@@ -0,0 +1,122 @@
+"""Per-server tool-catalog cache for ``list_server_tools``.
+
+Each entry holds a server's tool list already rendered as compact JSON,
+plus a fingerprint (SHA-256 of that JSON).  Hot servers are answered
+straight from the cached string -- no round trip and no re-serialization.
+
+An entry is refreshed when:
+  - it is older than ``MCP_TOOL_CATALOG_TTL``, or
+  - the server sends ``notifications/tools/list_changed`` on its pooled
+    session, or
+  - the caller asks for ``refresh=True``.
+
+A refresh whose fingerprint matches the cached one keeps the cached entry
+(and its rendered JSON), only bumping its age.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from mcp import types
+
+CATALOG_TTL = float(os.environ.get("MCP_TOOL_CATALOG_TTL", "300"))
+CATALOG_MAX = int(os.environ.get("MCP_TOOL_CATALOG_MAX", "128"))
+
+COMPACT = {"separators": (",", ":"), "ensure_ascii": False}
+
+
+@dataclass
+class CatalogEntry:
+    tools_json: str  # compact JSON array of {name, description, inputSchema}
+    fingerprint: str
+    tool_names: frozenset[str]
+    fetched_at: float
+
+
+class ToolCatalogCache:
+    """LRU of :class:`CatalogEntry` keyed by resolved server URL."""
+
+    def __init__(self, ttl: float = CATALOG_TTL, maxsize: int = CATALOG_MAX) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CatalogEntry] = OrderedDict()
+
+    def get(self, url: str) -> CatalogEntry | None:
+        entry = self._entries.get(url)
+        if entry is None or time.monotonic() - entry.fetched_at > self.ttl:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(url)
+        self.hits += 1
+        return entry
+
+    def put(self, url: str, tools: list[types.Tool]) -> CatalogEntry:
+        """Store a freshly listed catalog; reuse the cached entry if unchanged."""
+        tools_json = json.dumps(
+            [
+                {
+                    "name": t.name,
+                    "description": t.description,
+                    "inputSchema": t.inputSchema,
+                }
+                for t in tools
+            ],
+            **COMPACT,
+        )
+        fingerprint = hashlib.sha256(tools_json.encode()).hexdigest()[:16]
+        entry = self._entries.get(url)
+        if entry is not None and entry.fingerprint == fingerprint:
+            entry.fetched_at = time.monotonic()
+        else:
+            entry = CatalogEntry(
+                tools_json=tools_json,
+                fingerprint=fingerprint,
+                tool_names=frozenset(t.name for t in tools),
+                fetched_at=time.monotonic(),
+            )
+            self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, url: str) -> None:
+        self._entries.pop(url, None)
+
+    def on_notification(
+        self, url: str, notification: types.ServerNotification
+    ) -> None:
+        """Session-pool listener: drop the entry when the tool list changes."""
+        if isinstance(notification.root, types.ToolListChangedNotification):
+            self.invalidate(url)
+
+    def stats(self) -> dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def render(entry: CatalogEntry, server: str, url: str) -> str:
+    """Compact ``list_server_tools`` response built around the cached JSON."""
+    return (
+        f'{{"server":{json.dumps(server)},"url":{json.dumps(url)},'
+        f'"fingerprint":"{entry.fingerprint}","tools":{entry.tools_json}}}'
+    )
+
+
+_catalog: ToolCatalogCache | None = None
+
+
+def get_catalog() -> ToolCatalogCache:
+    """Return the process-wide catalog cache."""
+    global _catalog
+    if _catalog is None:
+        _catalog = ToolCatalogCache()
+    return _catalog
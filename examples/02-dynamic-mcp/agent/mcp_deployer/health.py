@@ -0,0 +1,196 @@
+"""Per-endpoint health tracking and circuit breaking.
+
+Registry servers come and go.  Without tracking, every call to a dead
+endpoint waits out the full connect timeout.  :class:`HealthTracker`
+records latency and outcome per resolved URL and runs a small circuit
+breaker for each:
+
+  closed     normal operation; ``MCP_BREAKER_FAILURES`` consecutive
+             failures open the circuit.
+  open       calls fail immediately with :class:`CircuitOpenError` for
+             ``MCP_BREAKER_COOLDOWN`` seconds.
+  half_open  after the cooldown, a single trial call is let through; it
+             closes the circuit on success and re-opens it on failure.
+             Other calls keep failing fast while the trial runs.
+
+Only failures that say the endpoint itself is down count (see
+:func:`is_endpoint_failure`): connect and transport errors, sessions that
+could not be opened or lost their connection.  An error reply to a
+request (bad arguments, a failing tool) or a read timeout on a slow tool
+says nothing about the endpoint and is not recorded.
+
+:meth:`HealthTracker.report` summarizes every endpoint (state, error
+rate, p50/p95 latency) for the ``get_endpoint_health`` tool.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any
+
+import anyio
+import httpx
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from .sessions import SessionConnectError
+
+BREAKER_FAILURES = int(os.environ.get("MCP_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.environ.get("MCP_BREAKER_COOLDOWN", "30"))
+HEALTH_MAX_ENDPOINTS = 256
+# Recent call outcomes kept per endpoint for error rate and percentiles.
+HEALTH_WINDOW = 50
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, url: str, retry_in: float, last_error: str) -> None:
+        super().__init__(
+            f"Endpoint unhealthy, failing fast (retry in {retry_in:.0f} s); "
+            f"last error: {last_error}"
+        )
+        self.url = url
+        self.retry_in = retry_in
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """True if ``exc`` means the endpoint is unreachable or dropped the call."""
+    if isinstance(exc, McpError):
+        return exc.error.code == CONNECTION_CLOSED
+    if isinstance(exc, httpx.TimeoutException):
+        return isinstance(exc, httpx.ConnectTimeout)
+    return isinstance(
+        exc,
+        (
+            SessionConnectError,
+            httpx.TransportError,
+            ConnectionError,
+            anyio.ClosedResourceError,
+            anyio.BrokenResourceError,
+        ),
+    )
+
+
+@dataclass
+class EndpointHealth:
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    trial_in_flight: bool = False
+    last_error: str = ""
+    # (ok, latency_s) of the most recent calls
+    recent: deque[tuple[bool, float]] = field(
+        default_factory=lambda: deque(maxlen=HEALTH_WINDOW)
+    )
+
+    def summary(self) -> dict[str, Any]:
+        latencies = sorted(lat for ok, lat in self.recent if ok)
+        errors = sum(1 for ok, _ in self.recent if not ok)
+        out: dict[str, Any] = {
+            "state": self.state,
+            "calls": len(self.recent),
+            "error_rate": round(errors / len(self.recent), 2) if self.recent else 0.0,
+        }
+        if latencies:
+            out["p50_ms"] = round(_percentile(latencies, 0.5) * 1000)
+            out["p95_ms"] = round(_percentile(latencies, 0.95) * 1000)
+        if self.last_error:
+            out["last_error"] = self.last_error
+        return out
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class HealthTracker:
+    """Circuit breaker + latency/error stats keyed by resolved URL."""
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURES,
+        cooldown: float = BREAKER_COOLDOWN,
+        max_endpoints: int = HEALTH_MAX_ENDPOINTS,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_endpoints = max_endpoints
+        self._endpoints: OrderedDict[str, EndpointHealth] = OrderedDict()
+
+    def before_call(self, url: str) -> None:
+        """Admit a call to ``url`` or raise :class:`CircuitOpenError`."""
+        health = self._get(url)
+        if health.state == CLOSED:
+            return
+        retry_in = health.opened_at + self.cooldown - time.monotonic()
+        if health.state == OPEN and retry_in <= 0:
+            health.state = HALF_OPEN
+        if health.state == HALF_OPEN and not health.trial_in_flight:
+            health.trial_in_flight = True
+            return
+        raise CircuitOpenError(url, max(retry_in, 0.0), health.last_error)
+
+    def record_success(self, url: str, latency: float) -> None:
+        health = self._get(url)
+        health.recent.append((True, latency))
+        health.consecutive_failures = 0
+        health.trial_in_flight = False
+        health.state = CLOSED
+
+    def record_failure(self, url: str, error: BaseException, latency: float) -> None:
+        health = self._get(url)
+        health.recent.append((False, latency))
+        health.last_error = str(error) or type(error).__name__
+        health.consecutive_failures += 1
+        trial_failed = health.trial_in_flight
+        health.trial_in_flight = False
+        if trial_failed or health.consecutive_failures >= self.failure_threshold:
+            health.state = OPEN
+            health.opened_at = time.monotonic()
+
+    def abandon(self, url: str) -> None:
+        """A call ended without a verdict on the endpoint; free the trial slot.
+
+        Used for cancelled calls and for failures that are not
+        :func:`is_endpoint_failure`.
+        """
+        self._get(url).trial_in_flight = False
+
+    def is_healthy(self, url: str) -> bool:
+        health = self._endpoints.get(url)
+        return health is None or health.state == CLOSED
+
+    def report(self, urls: list[str] | None = None) -> dict[str, dict[str, Any]]:
+        return {
+            url: health.summary()
+            for url, health in self._endpoints.items()
+            if urls is None or url in urls
+        }
+
+    def _get(self, url: str) -> EndpointHealth:
+        health = self._endpoints.get(url)
+        if health is None:
+            health = self._endpoints[url] = EndpointHealth()
+            while len(self._endpoints) > self.max_endpoints:
+                self._endpoints.popitem(last=False)
+        self._endpoints.move_to_end(url)
+        return health
+
+
+_tracker: HealthTracker | None = None
+
+
+def get_tracker() -> HealthTracker:
+    """Return the process-wide health tracker."""
+    global _tracker
+    if _tracker is None:
+        _tracker = HealthTracker()
+    return _tracker
@@ -0,0 +1,96 @@
+"""Readiness waiting for freshly deployed MCP servers.
+
+A stdio server deployed via ``deploy_server`` takes anywhere from a few
+seconds to a minute to come up.  Instead of sleeping a fixed interval
+between full MCP handshakes, :func:`wait_until_ready` polls a cheap probe
+-- a TCP connect, then an HTTP ``HEAD`` -- with exponential backoff and
+jitter, and returns as soon as the server answers.
+
+Any HTTP response other than 502/503/504 counts as ready: an MCP endpoint
+typically rejects ``HEAD`` with 405, which still proves the process is up.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+
+READY_TIMEOUT = float(os.environ.get("MCP_READY_TIMEOUT", "120"))
+READY_PROBE_TIMEOUT = float(os.environ.get("MCP_READY_PROBE_TIMEOUT", "2"))
+READY_BACKOFF_INITIAL = 0.25
+READY_BACKOFF_MAX = 5.0
+# A server seen ready this recently is not probed again.
+READY_MEMO_TTL = 60.0
+
+_GATEWAY_ERRORS = {502, 503, 504}
+_ready_at: dict[str, float] = {}
+
+
+@dataclass
+class ReadyResult:
+    ready: bool
+    waited: float
+    attempts: int
+    last_error: str = ""
+
+
+async def probe(url: str, timeout: float = READY_PROBE_TIMEOUT) -> str | None:
+    """Return None if ``url`` looks up, else a short reason it is not."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(parts.hostname, port), timeout
+        )
+    except (OSError, asyncio.TimeoutError) as exc:
+        return f"connect: {str(exc) or type(exc).__name__}"
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass  # the port answered; a reset while closing does not matter
+    try:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            resp = await client.head(url)
+    except httpx.HTTPError as exc:
+        return f"http: {str(exc) or type(exc).__name__}"
+    if resp.status_code in _GATEWAY_ERRORS:
+        return f"http: {resp.status_code}"
+    return None
+
+
+async def wait_until_ready(url: str, timeout: float = READY_TIMEOUT) -> ReadyResult:
+    """Poll :func:`probe` with backoff + jitter until ready or ``timeout``."""
+    started = time.monotonic()
+    if started - _ready_at.get(url, float("-inf")) < READY_MEMO_TTL:
+        return ReadyResult(ready=True, waited=0.0, attempts=0)
+
+    deadline = started + timeout
+    delay = READY_BACKOFF_INITIAL
+    attempts = 0
+    error = ""
+    while True:
+        attempts += 1
+        reason = await probe(url)
+        now = time.monotonic()
+        if reason is None:
+            _ready_at[url] = now
+            return ReadyResult(True, now - started, attempts)
+        error = reason
+        if now >= deadline:
+            return ReadyResult(False, now - started, attempts, error)
+        # "Equal jitter": half the backoff fixed, half random.
+        sleep = delay / 2 + random.uniform(0, delay / 2)
+        await asyncio.sleep(min(sleep, deadline - now))
+        delay = min(delay * 2, READY_BACKOFF_MAX)
+
+
+def mark_ready(url: str) -> None:
+    """Record that ``url`` just served a request (skips the next probe)."""
+    _ready_at[url] = time.monotonic()
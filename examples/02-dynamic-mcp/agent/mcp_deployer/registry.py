@@ -0,0 +1,359 @@
+"""Local, incrementally synced index of the AgentRegistry server catalog.
+
+``search_catalog`` answers discovery queries in-process instead of asking
+the registry (``list_servers`` / ``get_server``) on every task.  The index
+mirrors the registry's REST listing (``GET /v0/servers``, latest versions
+only) and keeps, per server, a compact summary: name, description, kind
+(remote or stdio), the remote URL or package, and the environment
+variables it requires.
+
+Syncing:
+  - the first search does a full sync, paging through the listing;
+  - after that, a search older than ``REGISTRY_SYNC_INTERVAL`` is answered
+    from the current index while a background sync fetches only servers
+    updated since the newest ``updatedAt`` seen (``updated_since``);
+  - servers the registry marks ``deleted`` are dropped, and a full resync
+    every ``REGISTRY_FULL_SYNC_INTERVAL`` catches any other removals.
+
+If a sync fails, the previous index keeps serving (reported as ``stale``).
+
+Ranking is BM25 over an inverted index.  Name tokens count three times and
+title tokens twice, so a query naming a server ranks it first.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_API_URL = os.environ.get(
+    "REGISTRY_API_URL", "http://agentregistry.agentregistry.svc.cluster.local:8080"
+)
+SYNC_INTERVAL = float(os.environ.get("REGISTRY_SYNC_INTERVAL", "60"))
+FULL_SYNC_INTERVAL = float(os.environ.get("REGISTRY_FULL_SYNC_INTERVAL", "3600"))
+SYNC_PAGE_SIZE = int(os.environ.get("REGISTRY_SYNC_PAGE_SIZE", "100"))
+SYNC_TIMEOUT = float(os.environ.get("REGISTRY_SYNC_TIMEOUT", "10"))
+
+# BM25 parameters and per-field term weights.
+BM25_K1 = 1.2
+BM25_B = 0.75
+FIELD_WEIGHTS = {"name": 3, "title": 2, "description": 1, "packages": 1}
+
+DESCRIPTION_MAX = 200
+_OFFICIAL_META = "io.modelcontextprotocol.registry/official"
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric runs, with a plural ``s`` stripped."""
+    return [
+        t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+        for t in _TOKEN.findall(text.lower())
+    ]
+
+
+@dataclass
+class ServerSummary:
+    name: str
+    version: str
+    description: str
+    kind: str  # "remote" or "stdio"
+    url: str | None = None  # first remote URL
+    package: str | None = None  # "<registryType>:<identifier>" of the first package
+    required_env: list[str] = field(default_factory=list)
+    updated_at: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "name": self.name,
+            "version": self.version,
+            "kind": self.kind,
+            "description": self.description,
+        }
+        if self.url:
+            out["url"] = self.url
+        if self.package:
+            out["package"] = self.package
+        if self.required_env:
+            out["required_env"] = self.required_env
+        return out
+
+
+def _parse(item: dict[str, Any]) -> tuple[ServerSummary, str, dict[str, str]] | None:
+    """Turn one listing item into ``(summary, status, fields)``.
+
+    Accepts both the wrapped (``{"server": ..., "_meta": ...}``) and the
+    flat listing format.  Returns None for items without a name.
+    """
+    server = item.get("server", item)
+    name = server.get("name")
+    if not name:
+        return None
+    meta = (item.get("_meta") or server.get("_meta") or {}).get(_OFFICIAL_META) or {}
+    if meta.get("isLatest") is False:
+        return None
+
+    remotes = server.get("remotes") or []
+    packages = server.get("packages") or []
+    package = None
+    required_env: list[str] = []
+    if packages:
+        first = packages[0]
+        package = f"{first.get('registryType', '?')}:{first.get('identifier', '?')}"
+        required_env = [
+            env["name"]
+            for env in first.get("environmentVariables") or []
+            if env.get("isRequired") and env.get("name")
+        ]
+    description = server.get("description") or ""
+    summary = ServerSummary(
+        name=name,
+        version=server.get("version") or "latest",
+        description=(
+            description
+            if len(description) <= DESCRIPTION_MAX
+            else description[: DESCRIPTION_MAX - 3].rstrip() + "..."
+        ),
+        kind="remote" if remotes else "stdio",
+        url=remotes[0].get("url") if remotes else None,
+        package=package,
+        required_env=required_env,
+        updated_at=meta.get("updatedAt") or meta.get("publishedAt") or "",
+    )
+    fields = {
+        "name": name.replace("/", " "),
+        "title": server.get("title") or "",
+        "description": description,
+        "packages": " ".join(p.get("identifier") or "" for p in packages),
+    }
+    return summary, meta.get("status", "active"), fields
+
+
+class CatalogIndex:
+    """BM25 inverted index of :class:`ServerSummary` keyed by server name."""
+
+    def __init__(self) -> None:
+        self.servers: dict[str, ServerSummary] = {}
+        self._postings: dict[str, dict[str, int]] = {}  # term -> name -> tf
+        self._terms: dict[str, Counter[str]] = {}  # name -> its term counts
+        self._lengths: dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.servers)
+
+    def add(self, summary: ServerSummary, fields: dict[str, str]) -> None:
+        self.remove(summary.name)
+        terms: Counter[str] = Counter()
+        for field_name, text in fields.items():
+            weight = FIELD_WEIGHTS.get(field_name, 1)
+            for token in tokenize(text):
+                terms[token] += weight
+        name = summary.name
+        self.servers[name] = summary
+        self._terms[name] = terms
+        self._lengths[name] = sum(terms.values())
+        self._total_length += self._lengths[name]
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[name] = tf
+
+    def remove(self, name: str) -> None:
+        terms = self._terms.pop(name, None)
+        if terms is None:
+            return
+        del self.servers[name]
+        self._total_length -= self._lengths.pop(name)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[name]
+            if not posting:
+                del self._postings[term]
+
+    def search(
+        self, query: str, limit: int = 10, kind: str | None = None
+    ) -> list[tuple[float, ServerSummary]]:
+        """Return up to ``limit`` ``(score, summary)`` pairs, best first."""
+        n = len(self.servers)
+        if not n:
+            return []
+        avg_length = self._total_length / n
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for name, tf in posting.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[name] / avg_length)
+                scores[name] = scores.get(name, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        results = []
+        for name, score in ranked:
+            summary = self.servers[name]
+            if kind is None or summary.kind == kind:
+                results.append((score, summary))
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class RegistryCatalog:
+    """A :class:`CatalogIndex` kept in sync with the registry listing."""
+
+    def __init__(
+        self,
+        base_url: str = REGISTRY_API_URL,
+        sync_interval: float = SYNC_INTERVAL,
+        full_sync_interval: float = FULL_SYNC_INTERVAL,
+        page_size: int = SYNC_PAGE_SIZE,
+        timeout: float = SYNC_TIMEOUT,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.sync_interval = sync_interval
+        self.full_sync_interval = full_sync_interval
+        self.page_size = page_size
+        self.timeout = timeout
+        self.index = CatalogIndex()
+        self.synced_at = float("-inf")  # monotonic time of the last good sync
+        self.full_synced_at = float("-inf")
+        self.last_error: str | None = None
+        self.syncs = 0
+        self._updated_since = ""  # newest updatedAt seen
+        self._lock: asyncio.Lock | None = None
+        self._refresh: asyncio.Task | None = None
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self.synced_at > self.sync_interval
+
+    async def ensure_fresh(self) -> None:
+        """Sync if never synced; otherwise refresh in the background if stale."""
+        if self.synced_at == float("-inf"):
+            await self.sync()
+        elif self.stale and (self._refresh is None or self._refresh.done()):
+            self._refresh = asyncio.create_task(self._background_sync())
+
+    async def _background_sync(self) -> None:
+        try:
+            await self.sync()
+        except Exception as exc:
+            logger.warning("Registry catalog sync failed: %s", exc)
+
+    async def sync(self, full: bool = False) -> int:
+        """Fetch changes since the last sync; return the number of servers applied.
+
+        Raises on network or HTTP errors (``last_error`` is set too).
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        requested = time.monotonic()
+        async with self._lock:
+            if not full and self.synced_at >= requested:
+                return 0  # another caller synced while this one waited
+            now = time.monotonic()
+            full = (
+                full
+                or not self._updated_since
+                or now - self.full_synced_at > self.full_sync_interval
+            )
+            try:
+                applied = await self._fetch(full)
+            except Exception as exc:
+                self.last_error = str(exc) or type(exc).__name__
+                raise
+            self.last_error = None
+            self.synced_at = time.monotonic()
+            if full:
+                self.full_synced_at = self.synced_at
+            self.syncs += 1
+            return applied
+
+    async def _fetch(self, full: bool) -> int:
+        params: dict[str, Any] = {"limit": self.page_size, "version": "latest"}
+        if not full:
+            params["updated_since"] = self._updated_since
+        seen: set[str] = set()
+        staged: list[tuple[ServerSummary, str, dict[str, str]]] = []
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout) as client:
+            while True:
+                resp = await client.get("/v0/servers", params=params)
+                resp.raise_for_status()
+                body = resp.json()
+                for item in body.get("servers") or []:
+                    parsed = _parse(item)
+                    if parsed is not None:
+                        staged.append(parsed)
+                cursor = (body.get("metadata") or {}).get("nextCursor")
+                if not cursor:
+                    break
+                params["cursor"] = cursor
+
+        # Apply only after every page arrived, so a failed sync changes nothing.
+        for summary, status, fields in staged:
+            if status == "deleted":
+                self.index.remove(summary.name)
+                continue
+            self.index.add(summary, fields)
+            seen.add(summary.name)
+            self._updated_since = max(self._updated_since, summary.updated_at)
+        if full:
+            for name in set(self.index.servers) - seen:
+                self.index.remove(name)
+        return len(staged)
+
+    async def search(
+        self, query: str, limit: int = 10, kind: str | None = None
+    ) -> dict[str, Any]:
+        """Compact search response: matching summaries plus index freshness."""
+        error = None
+        try:
+            await self.ensure_fresh()
+        except Exception as exc:
+            error = str(exc) or type(exc).__name__
+        if error and not len(self.index):
+            return {
+                "error": f"Registry catalog unavailable: {error}",
+                "hint": "Fall back to list_servers.",
+            }
+        results = [
+            {**summary.to_dict(), "score": round(score, 2)}
+            for score, summary in self.index.search(query, limit, kind)
+        ]
+        response: dict[str, Any] = {
+            "servers": results,
+            "indexed": len(self.index),
+            "synced_s_ago": round(time.monotonic() - self.synced_at),
+        }
+        if self.last_error:
+            response["stale"] = self.last_error
+        return response
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "servers": len(self.index),
+            "terms": len(self.index._postings),
+            "syncs": self.syncs,
+            "last_error": self.last_error,
+        }
+
+
+_registry: RegistryCatalog | None = None
+
+
+def get_registry_catalog() -> RegistryCatalog:
+    """Return the process-wide registry catalog index."""
+    global _registry
+    if _registry is None:
+        _registry = RegistryCatalog()
+    return _registry
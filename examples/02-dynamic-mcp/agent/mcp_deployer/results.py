@@ -0,0 +1,240 @@
+"""Size-bounded tool results with a local spill store.
+
+MCP tool results go straight into the model's prompt, so one large
+response (a file dump, a long search listing, an image) can blow the
+context window.  :func:`bound_result` walks a result's content items one
+at a time and keeps only what fits the budget: ``MCP_RESULT_MAX_BYTES``,
+and ``MCP_RESULT_MAX_TOKENS`` estimated at 4 bytes per token.  Every kept
+item is measured the same way, as its compact JSON encoding in bytes, and
+checked against the budget before it is added.
+
+  - Text is cut to fit, with a note saying how much was left out.
+  - Binary items (images, audio, blob resources) are replaced by a summary
+    of their type and size; their base64 data is never useful in a prompt.
+  - Any other item that does not fit whole (structured content, a resource
+    link) is replaced by a short summary of its type and size.
+  - Once nothing more fits, remaining items are only counted.
+
+If anything was cut, every item is spilled in full to
+:class:`SpillStore` (one JSON line per item under ``MCP_RESULT_SPILL_DIR``)
+and the response carries a ``result_id`` the agent can page through with
+``read_tool_result``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from mcp import types
+
+from .catalog import COMPACT
+
+RESULT_MAX_BYTES = int(os.environ.get("MCP_RESULT_MAX_BYTES", "16000"))
+RESULT_MAX_TOKENS = int(os.environ.get("MCP_RESULT_MAX_TOKENS", "4000"))
+RESULT_SPILL_DIR = os.environ.get(
+    "MCP_RESULT_SPILL_DIR", os.path.join(tempfile.gettempdir(), "mcp-results")
+)
+RESULT_SPILL_MAX = int(os.environ.get("MCP_RESULT_SPILL_MAX", "64"))
+
+BYTES_PER_TOKEN = 4
+# Never leave a single call less than this, however the budget is split.
+MIN_BUDGET = 1024
+
+
+def default_budget() -> int:
+    return min(RESULT_MAX_BYTES, RESULT_MAX_TOKENS * BYTES_PER_TOKEN)
+
+
+def _cut(text: str, limit: int) -> str:
+    """First ``limit`` UTF-8 bytes of ``text``, on a character boundary."""
+    return text.encode()[:limit].decode(errors="ignore")
+
+
+def _summarize_binary(item: dict[str, Any], data: str) -> dict[str, Any]:
+    summary = {k: v for k, v in item.items() if k not in ("data", "resource")}
+    resource = item.get("resource")
+    if resource is not None:
+        summary["uri"] = str(resource.get("uri"))
+        summary["mimeType"] = resource.get("mimeType")
+    summary["bytes"] = len(data) * 3 // 4  # decoded base64 size
+    summary["omitted"] = "binary content"
+    return summary
+
+
+def _item_text(item: dict[str, Any]) -> str | None:
+    if item.get("type") == "text":
+        return item.get("text", "")
+    resource = item.get("resource")
+    if resource is not None and "text" in resource:
+        return resource["text"]
+    return None
+
+
+def _size(item: dict[str, Any]) -> int:
+    """Bytes ``item`` takes in the JSON response."""
+    return len(json.dumps(item, **COMPACT).encode())
+
+
+def _summarize(item: dict[str, Any]) -> dict[str, Any]:
+    """Stand-in for a non-text item too large for the remaining budget."""
+    return {"type": item.get("type"), "bytes": _size(item), "omitted": "over budget"}
+
+
+def _fit_text(item: dict[str, Any], text: str, room: int) -> dict[str, Any] | None:
+    """``item`` with its text cut so the whole item takes at most ``room`` bytes.
+
+    Returns None if not even the truncation note fits.
+    """
+    size = len(text.encode())
+    shown = text
+    while True:
+        cut = _with_text(
+            item, f"{shown}\n[... {size - len(shown.encode())} more bytes]"
+        )
+        total = _size(cut)
+        if total <= room:
+            return cut
+        if not shown:
+            return None
+        # Escaping can make the JSON longer than the text, so trimming by the
+        # excess alone may not be enough; trim proportionally too and re-measure.
+        length = len(shown.encode())
+        shown = _cut(shown, max(length - (total - room), length * room // total, 0))
+
+
+def _with_text(item: dict[str, Any], text: str) -> dict[str, Any]:
+    """Copy of a text or text-resource item with its text replaced."""
+    if item.get("type") == "text":
+        return {**item, "text": text}
+    return {**item, "resource": {**item["resource"], "text": text}}
+
+
+class SpillStore:
+    """Full tool results on local disk, one JSON line per content item.
+
+    Keeps the ``max_results`` most recent results; older files are deleted.
+    """
+
+    def __init__(
+        self, directory: str = RESULT_SPILL_DIR, max_results: int = RESULT_SPILL_MAX
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_results = max_results
+        # result_id -> byte offset of each item's line in the spill file
+        self._index: OrderedDict[str, list[int]] = OrderedDict()
+
+    def save(self, items: list[dict[str, Any]]) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        result_id = uuid.uuid4().hex[:12]
+        offsets = []
+        with self._path(result_id).open("wb") as f:
+            for item in items:
+                offsets.append(f.tell())
+                f.write(json.dumps(item, **COMPACT).encode() + b"\n")
+        self._index[result_id] = offsets
+        while len(self._index) > self.max_results:
+            old, _ = self._index.popitem(last=False)
+            self._path(old).unlink(missing_ok=True)
+        return result_id
+
+    def read(self, result_id: str, item: int, offset: int, limit: int) -> dict[str, Any]:
+        """Return up to ``limit`` bytes of one item, starting at ``offset``.
+
+        Text items are paged by their text; other items by their JSON.
+        """
+        offsets = self._index.get(result_id)
+        if offsets is None:
+            raise KeyError(f"Unknown or expired result_id {result_id!r}")
+        if not 0 <= item < len(offsets):
+            raise IndexError(f"item must be in [0, {len(offsets)})")
+        with self._path(result_id).open("rb") as f:
+            f.seek(offsets[item])
+            data = json.loads(f.readline())
+        text = _item_text(data)
+        if text is None:
+            text = json.dumps(data, **COMPACT)
+        raw = text.encode()
+        chunk = raw[offset : offset + limit].decode(errors="ignore")
+        end = offset + len(chunk.encode())
+        page: dict[str, Any] = {
+            "result_id": result_id,
+            "item": item,
+            "items": len(offsets),
+            "offset": offset,
+            "total_bytes": len(raw),
+            "text": chunk,
+        }
+        if end < len(raw):
+            page["next"] = {"item": item, "offset": end}
+        elif item + 1 < len(offsets):
+            page["next"] = {"item": item + 1, "offset": 0}
+        return page
+
+    def _path(self, result_id: str) -> Path:
+        return self.directory / f"{result_id}.jsonl"
+
+
+def bound_result(
+    tool_name: str, content: list[types.ContentBlock], budget: int | None = None
+) -> dict[str, Any]:
+    """Build the ``{"tool", "result"}`` response within ``budget`` bytes."""
+    budget = max(budget or default_budget(), MIN_BUDGET)
+    items = []
+    kept = []
+    used = 0
+    cut = False
+    full = False  # nothing more fits; remaining items are only counted
+    for block in content:
+        item = block.model_dump(mode="json", exclude_none=True)
+        items.append(item)
+        if full:
+            continue
+        room = budget - used
+        data = item.get("data") or (item.get("resource") or {}).get("blob")
+        if data is not None:
+            shown = _summarize_binary(item, data)
+            cut = True
+        elif _size(item) <= room:
+            shown = item
+        else:
+            cut = True
+            text = _item_text(item)
+            if text is None:
+                shown = _summarize(item)
+            else:
+                # A text cut to fit uses up the budget.
+                shown = _fit_text(item, text, room)
+                full = True
+        size = _size(shown) if shown is not None else room + 1
+        if size > room:
+            cut = full = True
+            continue
+        kept.append(shown)
+        used += size
+
+    response: dict[str, Any] = {"tool": tool_name, "result": kept}
+    if cut:
+        response["truncated"] = {
+            "items": len(items),
+            "items_shown": len(kept),
+            "result_id": get_spill_store().save(items),
+            "hint": "Page through the full result with read_tool_result.",
+        }
+    return response
+
+
+_store: SpillStore | None = None
+
+
+def get_spill_store() -> SpillStore:
+    """Return the process-wide spill store."""
+    global _store
+    if _store is None:
+        _store = SpillStore()
+    return _store
@@ -0,0 +1,316 @@
+"""Pooled, reusable MCP client sessions.
+
+Opening an MCP session costs a connect plus the ``initialize`` handshake.
+:class:`SessionPool` keeps one initialized session per resolved URL and
+hands it to every later call, so repeat calls to a server skip both.
+
+Each session is owned by a dedicated background task: the MCP transport
+and ``ClientSession`` are anyio context managers that must be entered and
+exited by the same task, while requests may be sent from any task.
+
+Pool hygiene:
+  - Sessions idle longer than ``idle_timeout`` are closed on the next pool
+    access.
+  - At ``max_sessions`` the least recently used idle session is closed to
+    make room.
+  - A session idle longer than ``ping_interval`` is pinged before reuse and
+    replaced if the ping fails.
+  - A call whose request could not be sent on a pooled session (its
+    streams were already closed, or the connection was refused) is retried
+    once on a fresh one.  Any other failure is raised as is, so a
+    non-idempotent tool never runs twice.  Error replies (``McpError``)
+    and timeouts keep the session, unless the reply says its connection
+    closed.
+
+Every call is bounded by a connect timeout (opening a new session) and a
+read timeout (waiting for the response), both overridable per call.  A
+session that cannot be opened raises :class:`SessionConnectError`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+import anyio
+import httpx
+from mcp import ClientSession, types
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from . import telemetry
+
+logger = logging.getLogger(__name__)
+
+SESSION_MAX = int(os.environ.get("MCP_SESSION_MAX", "32"))
+SESSION_IDLE_TIMEOUT = float(os.environ.get("MCP_SESSION_IDLE_TIMEOUT", "300"))
+SESSION_PING_INTERVAL = float(os.environ.get("MCP_SESSION_PING_INTERVAL", "30"))
+SESSION_PING_TIMEOUT = float(os.environ.get("MCP_SESSION_PING_TIMEOUT", "5"))
+SESSION_CLOSE_TIMEOUT = 5.0
+# Defaults for SessionPool.call; callers may override them per call.
+CONNECT_TIMEOUT = float(os.environ.get("MCP_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.environ.get("MCP_READ_TIMEOUT", "60"))
+
+T = TypeVar("T")
+
+# Failures that mean the request never reached the server: the session's
+# streams were closed before the write, or no connection could be made.
+NOT_SENT_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    httpx.ConnectError,
+    ConnectionRefusedError,
+)
+
+# Called with (url, notification) for every server notification received on
+# a pooled session, e.g. ``notifications/tools/list_changed``.
+NotificationListener = Callable[[str, types.ServerNotification], None]
+
+
+class SessionConnectError(Exception):
+    """Connecting or initializing a new session failed or timed out."""
+
+    def __init__(self, url: str, reason: str) -> None:
+        super().__init__(f"Could not connect to {url}: {reason}")
+        self.url = url
+
+
+class PooledSession:
+    """An initialized MCP session kept open by its own owner task."""
+
+    def __init__(
+        self, url: str, listeners: list[NotificationListener] | None = None
+    ) -> None:
+        self.url = url
+        self._listeners = listeners if listeners is not None else []
+        self.session: ClientSession | None = None
+        self.last_used = time.monotonic()
+        self.in_use = 0
+        self._ready: asyncio.Future[None] | None = None
+        self._stop = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Connect and initialize; raises if either fails."""
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._task = loop.create_task(self._run(), name=f"mcp-session {self.url}")
+        await self._ready
+
+    async def _run(self) -> None:
+        try:
+            async with streamablehttp_client(self.url) as (read, write, _):
+                async with ClientSession(
+                    read, write, message_handler=self._on_message
+                ) as session:
+                    with telemetry.span("mcp.initialize", url=self.url):
+                        await session.initialize()
+                    self.session = session
+                    self._ready.set_result(None)
+                    await self._stop.wait()
+        except BaseException as exc:
+            # Surface the real cause rather than anyio's one-item group.
+            while isinstance(exc, BaseExceptionGroup) and len(exc.exceptions) == 1:
+                exc = exc.exceptions[0]
+            if not self._ready.done():
+                self._ready.set_exception(exc)
+            elif not isinstance(exc, asyncio.CancelledError):
+                logger.debug("MCP session %s ended: %s", self.url, exc)
+        finally:
+            self.session = None
+
+    async def _on_message(self, message) -> None:
+        if isinstance(message, types.ServerNotification):
+            for listener in self._listeners:
+                listener(self.url, message)
+
+    async def ping(self, timeout: float) -> bool:
+        if self.session is None or not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+        except Exception:
+            return False
+        return True
+
+    def abort(self) -> None:
+        """Tear down a session that is still connecting."""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def aclose(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, SESSION_CLOSE_TIMEOUT)
+            except Exception:
+                self._task.cancel()
+
+
+class SessionPool:
+    """One reusable :class:`PooledSession` per URL, bounded and health-checked."""
+
+    def __init__(
+        self,
+        max_sessions: int = SESSION_MAX,
+        idle_timeout: float = SESSION_IDLE_TIMEOUT,
+        ping_interval: float = SESSION_PING_INTERVAL,
+        ping_timeout: float = SESSION_PING_TIMEOUT,
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self._sessions: dict[str, PooledSession] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._listeners: list[NotificationListener] = []
+
+    def add_listener(self, listener: NotificationListener) -> None:
+        """Receive server notifications from every pooled session."""
+        self._listeners.append(listener)
+
+    async def call(
+        self,
+        url: str,
+        fn: Callable[[ClientSession], Awaitable[T]],
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+    ) -> T:
+        """Run ``fn(session)`` on the pooled session for ``url``.
+
+        If a reused session turns out to be dead before the request was
+        sent (:data:`NOT_SENT_ERRORS`), it is discarded and ``fn`` is retried
+        once on a freshly connected one; nothing else is retried.  Raises
+        :class:`SessionConnectError` if a new session cannot be opened
+        within ``connect_timeout``, and ``asyncio.TimeoutError`` if ``fn``
+        takes longer than ``read_timeout``.
+        """
+        connect_timeout = connect_timeout or CONNECT_TIMEOUT
+        read_timeout = read_timeout or READ_TIMEOUT
+        retried = False
+        while True:
+            pooled, reused = await self._acquire(url, connect_timeout)
+            try:
+                return await asyncio.wait_for(fn(pooled.session), read_timeout)
+            except asyncio.TimeoutError:
+                raise  # a slow server, not a broken session
+            except McpError as exc:
+                # The request may have run: never retried, but a session whose
+                # transport failed under it is dropped.
+                if exc.error.code == CONNECTION_CLOSED:
+                    await self._discard(pooled)
+                raise
+            except NOT_SENT_ERRORS:
+                await self._discard(pooled)
+                if not reused or retried:
+                    raise
+                retried = True
+                logger.debug("Reconnecting MCP session %s; request not sent", url)
+            except Exception:
+                await self._discard(pooled)
+                raise
+            finally:
+                self._release(pooled)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        now = time.monotonic()
+        return {
+            url: {"idle_s": round(now - s.last_used, 1), "in_use": s.in_use}
+            for url, s in self._sessions.items()
+        }
+
+    async def aclose(self) -> None:
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(s.aclose() for s in sessions))
+
+    # -- internals -----------------------------------------------------------
+
+    async def _acquire(
+        self, url: str, connect_timeout: float
+    ) -> tuple[PooledSession, bool]:
+        """Return ``(session, reused)``, connecting if needed."""
+        await self._evict_idle()
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            pooled = self._sessions.get(url)
+            if pooled is not None and not await self._healthy(pooled):
+                await self._discard(pooled)
+                pooled = None
+            reused = pooled is not None
+            if pooled is None:
+                await self._make_room()
+                pooled = PooledSession(url, self._listeners)
+                try:
+                    # The session task inherits this context, so its
+                    # mcp.initialize span nests under mcp.connect.
+                    with telemetry.span("mcp.connect", url=url):
+                        await asyncio.wait_for(pooled.start(), connect_timeout)
+                except asyncio.TimeoutError:
+                    pooled.abort()
+                    raise SessionConnectError(
+                        url, f"timed out after {connect_timeout:g} s"
+                    ) from None
+                except Exception as exc:
+                    raise SessionConnectError(
+                        url, str(exc) or type(exc).__name__
+                    ) from exc
+                self._sessions[url] = pooled
+            pooled.in_use += 1
+            pooled.last_used = time.monotonic()
+            return pooled, reused
+
+    def _release(self, pooled: PooledSession) -> None:
+        pooled.in_use -= 1
+        pooled.last_used = time.monotonic()
+
+    async def _healthy(self, pooled: PooledSession) -> bool:
+        if not pooled.alive:
+            return False
+        if time.monotonic() - pooled.last_used < self.ping_interval:
+            return True
+        return await pooled.ping(self.ping_timeout)
+
+    async def _discard(self, pooled: PooledSession) -> None:
+        # The URL's lock is kept: dropping it while a caller waits on it
+        # would let a second caller connect a duplicate session.
+        if self._sessions.get(pooled.url) is pooled:
+            del self._sessions[pooled.url]
+        await pooled.aclose()
+
+    async def _evict_idle(self) -> None:
+        now = time.monotonic()
+        idle = [
+            s
+            for s in self._sessions.values()
+            if s.in_use == 0 and now - s.last_used > self.idle_timeout
+        ]
+        for pooled in idle:
+            await self._discard(pooled)
+
+    async def _make_room(self) -> None:
+        while len(self._sessions) >= self.max_sessions:
+            idle = [s for s in self._sessions.values() if s.in_use == 0]
+            if not idle:
+                return  # every session is busy; allow a temporary overshoot
+            await self._discard(min(idle, key=lambda s: s.last_used))
+
+
+_pool: SessionPool | None = None
+
+
+def get_pool() -> SessionPool:
+    """Return the process-wide session pool."""
+    global _pool
+    if _pool is None:
+        _pool = SessionPool()
+    return _pool
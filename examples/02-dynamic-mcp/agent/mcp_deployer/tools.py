@@ -1,10 +1,17 @@
 """Custom tools for dynamically connecting to MCP servers.
 
+Sessions are pooled per resolved URL (see ``sessions.py``), so only the
+first call to a server pays the connect + ``initialize`` handshake.
+Deployed servers are polled with a cheap readiness probe (see
+``readiness.py``) before that handshake is attempted.
+
 Supports two modes:
   1. **Remote** — server already running at a public URL (from the registry's
      ``remotes`` field).  Pass the URL directly.
   2. **Deployed** — server deployed to Kubernetes via ``deploy_server``.  Pass
      the server name and the URL is derived from the in-cluster Service.
+     Deployments go through a warm pool (see ``warmpool.py``) that keeps
+     frequently requested servers running.
 """
 
 from __future__ import annotations
@@ -12,30 +19,52 @@ from __future__ import annotations
 import asyncio
 import json
 import os
-import re
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
 
 from mcp import ClientSession
-from mcp.client.streamable_http import streamablehttp_client
 
-DEFAULT_NAMESPACE = os.environ.get("MCP_SERVER_NAMESPACE", "agentregistry")
-DEFAULT_PORT = int(os.environ.get("MCP_SERVER_PORT", "3000"))
+from . import telemetry
+from .catalog import COMPACT, get_catalog, render
+from .health import CircuitOpenError, get_tracker, is_endpoint_failure
+from .readiness import READY_TIMEOUT, mark_ready, wait_until_ready
+from .registry import get_registry_catalog
+from .results import MIN_BUDGET, bound_result, default_budget, get_spill_store
+from .sessions import get_pool
+from .warmpool import DeployError, get_warm_pool
 
+BATCH_MAX_CALLS = int(os.environ.get("MCP_BATCH_MAX_CALLS", "20"))
+BATCH_PER_SERVER = int(os.environ.get("MCP_BATCH_PER_SERVER", "4"))
+BATCH_CALL_TIMEOUT = float(os.environ.get("MCP_BATCH_CALL_TIMEOUT", "60"))
+# Per-server semaphores kept at once; the least recently used go first.
+BATCH_MAX_SERVERS = 256
 
-def _sanitize_k8s_name(name: str) -> str:
-    """Mirror AgentRegistry's sanitizeK8sName (Go) in Python.
+T = TypeVar("T")
+
+# Per-server concurrency limits for call_mcp_tools_batch, keyed by URL.
+_server_limits: OrderedDict[str, asyncio.Semaphore] = OrderedDict()
+
+
+# Drop cached tool catalogs when a server announces its tool list changed.
+get_pool().add_listener(get_catalog().on_notification)
 
-    Rules: lowercase → replace non-[a-z0-9] with '-' → collapse runs of '-'
-    → trim leading/trailing '-' → truncate to 63 chars.
-    """
-    name = name.lower()
-    name = re.sub(r"[^a-z0-9-]", "-", name)
-    name = re.sub(r"-+", "-", name)
-    return name.strip("-")[:63]
 
+def _server_limit(url: str) -> asyncio.Semaphore:
+    """The batch concurrency limit for ``url``, created on first use.
 
-def _deployed_server_url(server_name: str) -> str:
-    sanitized = _sanitize_k8s_name(server_name)
-    return f"http://{sanitized}.{DEFAULT_NAMESPACE}.svc.cluster.local:{DEFAULT_PORT}/mcp"
+    Created lazily so the semaphores bind to the running loop.  A limit is
+    only evicted after ``BATCH_MAX_SERVERS`` other servers were used since,
+    so one still held by a running batch is effectively never replaced.
+    """
+    limit = _server_limits.get(url)
+    if limit is None:
+        limit = _server_limits[url] = asyncio.Semaphore(BATCH_PER_SERVER)
+        while len(_server_limits) > BATCH_MAX_SERVERS:
+            _server_limits.popitem(last=False)
+    _server_limits.move_to_end(url)
+    return limit
 
 
 def _resolve_url(server_name: str | None, url: str | None) -> str:
@@ -43,13 +72,88 @@ def _resolve_url(server_name: str | None, url: str | None) -> str:
     if url:
         return url
     if server_name:
-        return _deployed_server_url(server_name)
+        return get_warm_pool().backend.url(server_name)
     raise ValueError("Provide either server_name or url")
 
 
+async def deploy_server(
+    server_name: str, version: str = "latest", config: dict | None = None
+) -> str:
+    """Deploy a stdio MCP server to Kubernetes (or reuse a running one).
+
+    Frequently used servers are kept deployed, so this often returns at
+    once with ``warm: true``.  Then call list_server_tools with the same
+    ``server_name``; it waits until the server is ready.
+
+    Args:
+        server_name: Exact server name from the catalog.
+        version:     Server version ("latest" if unsure).
+        config:      Settings the server needs (API keys, tokens), as given
+                     in its README / ``required_env``.
+    """
+    try:
+        deployment = await get_warm_pool().acquire(server_name, version, config)
+    except Exception as exc:
+        message = str(exc) or type(exc).__name__
+        if not isinstance(exc, DeployError):
+            message = f"Registry unreachable: {message}"
+        return json.dumps({"error": message, "server_name": server_name})
+    return json.dumps(deployment)
+
+
+async def _guarded_call(
+    resolved: str,
+    operation: str,
+    fn: Callable[[ClientSession], Awaitable[T]],
+    connect_timeout: float | None = None,
+    read_timeout: float | None = None,
+) -> T:
+    """``get_pool().call`` behind the endpoint's circuit breaker.
+
+    Raises :class:`CircuitOpenError` without touching the network if the
+    endpoint is known to be failing.  Only endpoint failures (see
+    ``health.is_endpoint_failure``) count against the circuit; tool errors
+    and read timeouts are raised without being recorded.  ``operation``
+    names the trace span.
+    A warm-pool server at ``resolved`` counts as in use for the call.
+    """
+    tracker = get_tracker()
+    tracker.before_call(resolved)
+    started = time.monotonic()
+    try:
+        # Keeps a warm server from being evicted while it is being called.
+        with telemetry.span(operation, url=resolved), get_warm_pool().using(resolved):
+            result = await get_pool().call(resolved, fn, connect_timeout, read_timeout)
+    except Exception as exc:
+        if is_endpoint_failure(exc):
+            tracker.record_failure(resolved, exc, time.monotonic() - started)
+        else:
+            tracker.abandon(resolved)
+        raise
+    except BaseException:
+        tracker.abandon(resolved)
+        raise
+    tracker.record_success(resolved, time.monotonic() - started)
+    return result
+
+
+def _error(exc: Exception, resolved: str) -> dict[str, Any]:
+    if isinstance(exc, asyncio.TimeoutError):
+        message = "Timed out"
+    else:
+        message = str(exc) or type(exc).__name__
+    error: dict[str, Any] = {"error": message, "url": resolved}
+    if isinstance(exc, CircuitOpenError):
+        error["health"] = get_tracker().report([resolved]).get(resolved)
+    return error
+
+
 async def list_server_tools(
     server_name: str | None = None,
     url: str | None = None,
+    refresh: bool = False,
+    connect_timeout: float | None = None,
+    read_timeout: float | None = None,
 ) -> str:
     """List available tools on an MCP server.
 
@@ -58,54 +162,106 @@ async def list_server_tools(
 
     For **deployed** servers (created via deploy_server), pass
     ``server_name`` — the exact name used in deploy_server.  The in-cluster
-    Service URL is derived automatically.  Retries for up to ~50 s while the
-    pod starts.
+    Service URL is derived automatically.  Waits (up to
+    ``MCP_READY_TIMEOUT``) for the pod to start accepting connections.
+
+    Catalogs are cached per server and refreshed automatically when stale or
+    when the server reports its tool list changed.  The ``fingerprint`` in
+    the result changes whenever the tool list does.
 
     Args:
         server_name: Server name from deploy_server (for deployed servers).
         url: Direct MCP endpoint URL (for remote servers).
+        refresh: Bypass the cache and re-list tools from the server.
+        connect_timeout: Seconds allowed to connect (default MCP_CONNECT_TIMEOUT).
+        read_timeout: Seconds allowed for the response (default MCP_READ_TIMEOUT).
     """
     resolved = _resolve_url(server_name, url)
+    catalog = get_catalog()
+    entry = None if refresh else catalog.get(resolved)
+    if entry is not None:
+        get_warm_pool().touch(resolved)
+        return render(entry, server_name or url, resolved)
+
     is_deployed = url is None  # deployed servers may need startup time
-    max_attempts = 5 if is_deployed else 2
-    last_error: str = ""
+    if is_deployed:
+        with telemetry.span("mcp.ready", url=resolved):
+            ready = await wait_until_ready(resolved, READY_TIMEOUT)
+        if not ready.ready:
+            return json.dumps(
+                {
+                    "error": f"Server not ready after {ready.waited:.0f} s "
+                    f"({ready.last_error})",
+                    "url": resolved,
+                    "hint": "Server may still be starting. Try again in 30 s.",
+                }
+            )
+
+    # Deployed servers get one retry in case the handshake races startup;
+    # remote servers fail fast and are tracked by the circuit breaker.
+    max_attempts = 2 if is_deployed else 1
+    error: dict[str, Any] = {}
 
     for attempt in range(max_attempts):
         try:
-            async with streamablehttp_client(resolved) as (read, write, _):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    result = await session.list_tools()
-                    tools = [
-                        {
-                            "name": t.name,
-                            "description": t.description,
-                            "inputSchema": t.inputSchema,
-                        }
-                        for t in result.tools
-                    ]
-                    return json.dumps(
-                        {
-                            "server": server_name or url,
-                            "url": resolved,
-                            "tools": tools,
-                        },
-                        indent=2,
-                    )
+            result = await _guarded_call(
+                resolved,
+                "mcp.list_tools",
+                lambda s: s.list_tools(),
+                connect_timeout,
+                read_timeout,
+            )
+            mark_ready(resolved)
+            entry = catalog.put(resolved, result.tools)
+            rendered = render(entry, server_name or url, resolved)
+            telemetry.record_payload("mcp.list_tools", len(rendered))
+            return rendered
         except Exception as exc:
-            last_error = str(exc)
+            error = _error(exc, resolved)
+            if isinstance(exc, CircuitOpenError):
+                break
             if attempt < max_attempts - 1:
-                await asyncio.sleep(10 if is_deployed else 3)
+                await asyncio.sleep(1)
 
-    return json.dumps(
-        {
-            "error": last_error,
-            "url": resolved,
-            "hint": "Server may still be starting. Try again in 30 s."
-            if is_deployed
-            else "Remote server may be unreachable.",
-        }
+    error["hint"] = (
+        "Server is up but the MCP handshake failed."
+        if is_deployed
+        else "Remote server may be unreachable; prefer another server."
     )
+    return json.dumps(error)
+
+
+async def _call_tool(
+    resolved: str,
+    tool_name: str,
+    arguments: dict,
+    deployed: bool,
+    connect_timeout: float | None = None,
+    read_timeout: float | None = None,
+    budget: int | None = None,
+) -> dict[str, Any]:
+    """Call one tool; return ``{"tool", "result"}`` or ``{"error", "url"}``.
+
+    The timeouts bound the tool call itself, not the readiness wait.  The
+    result is cut to ``budget`` bytes (see ``results.py``).
+    """
+    if deployed:
+        with telemetry.span("mcp.ready", url=resolved):
+            ready = await wait_until_ready(resolved, READY_TIMEOUT)
+        if not ready.ready:
+            return {"error": ready.last_error, "url": resolved}
+    try:
+        result = await _guarded_call(
+            resolved,
+            "mcp.call_tool",
+            lambda s: s.call_tool(tool_name, arguments),
+            connect_timeout,
+            read_timeout,
+        )
+    except Exception as exc:
+        return _error(exc, resolved)
+    mark_ready(resolved)
+    return bound_result(tool_name, result.content, budget)
 
 
 async def call_mcp_tool(
@@ -113,27 +269,158 @@ async def call_mcp_tool(
     arguments: dict,
     server_name: str | None = None,
     url: str | None = None,
+    connect_timeout: float | None = None,
+    read_timeout: float | None = None,
 ) -> str:
     """Call a specific tool on an MCP server.
 
     For **remote** servers, pass ``url``.
     For **deployed** servers, pass ``server_name``.
 
+    Large results are truncated; the response then has a ``truncated``
+    entry with a ``result_id`` to page through with read_tool_result.
+
     Args:
         tool_name:   The tool name returned by list_server_tools.
         arguments:   A JSON object matching the tool's input schema.
         server_name: Server name from deploy_server (for deployed servers).
         url: Direct MCP endpoint URL (for remote servers).
+        connect_timeout: Seconds allowed to connect (default MCP_CONNECT_TIMEOUT).
+        read_timeout: Seconds allowed for the result (default MCP_READ_TIMEOUT).
     """
     resolved = _resolve_url(server_name, url)
-    try:
-        async with streamablehttp_client(resolved) as (read, write, _):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.call_tool(tool_name, arguments)
-                contents = [c.model_dump() for c in result.content]
-                return json.dumps(
-                    {"tool": tool_name, "result": contents}, indent=2
+    response = json.dumps(
+        await _call_tool(
+            resolved,
+            tool_name,
+            arguments,
+            deployed=url is None,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+        ),
+        **COMPACT,
+    )
+    telemetry.record_payload("mcp.call_tool", len(response))
+    return response
+
+
+async def call_mcp_tools_batch(
+    calls: list[dict],
+    timeout: float | None = None,
+) -> str:
+    """Call several MCP tools concurrently and return all results at once.
+
+    Use this instead of repeated call_mcp_tool turns when the calls do not
+    depend on each other (e.g. the same tool with different arguments, or
+    one query against several servers).
+
+    Each call is an object with ``tool_name``, ``arguments`` and either
+    ``server_name`` (deployed) or ``url`` (remote), exactly as for
+    call_mcp_tool.  Results come back in the same order; a failed call
+    gets an ``error`` entry without affecting the others.
+
+    Args:
+        calls:   List of {"tool_name", "arguments", "server_name" | "url"}.
+        timeout: Per-call timeout in seconds, including any wait for the
+                 server (default MCP_BATCH_CALL_TIMEOUT).
+    """
+    # Every call gets at least MIN_BUDGET bytes of result, so the batch
+    # size also caps the total returned at one default budget.
+    max_calls = max(1, min(BATCH_MAX_CALLS, default_budget() // MIN_BUDGET))
+    if len(calls) > max_calls:
+        return json.dumps(
+            {"error": f"At most {max_calls} calls per batch, got {len(calls)}"}
+        )
+    timeout = timeout if timeout and timeout > 0 else BATCH_CALL_TIMEOUT
+    # Share one result budget across the batch.
+    budget = default_budget() // max(len(calls), 1)
+
+    async def run(index: int, call: dict) -> dict[str, Any]:
+        if not isinstance(call, dict):
+            return {"index": index, "error": "Invalid call: expected an object"}
+        try:
+            url = call.get("url")
+            resolved = _resolve_url(call.get("server_name"), url)
+            tool_name = call["tool_name"]
+        except (KeyError, ValueError) as exc:
+            return {"index": index, "error": f"Invalid call: {exc}"}
+
+        async def attempt() -> dict[str, Any]:
+            async with _server_limit(resolved):
+                return await _call_tool(
+                    resolved,
+                    tool_name,
+                    call.get("arguments") or {},
+                    deployed=url is None,
+                    read_timeout=timeout,
+                    budget=budget,
                 )
-    except Exception as exc:
-        return json.dumps({"error": str(exc), "url": resolved})
+
+        # The timeout covers the whole call: the wait for a slot, the
+        # readiness wait and the connect, not only the tool's response.
+        try:
+            result = await asyncio.wait_for(attempt(), timeout)
+        except asyncio.TimeoutError:
+            result = {"error": f"Timed out after {timeout}s", "url": resolved}
+        return {"index": index, **result}
+
+    results = await asyncio.gather(*(run(i, c) for i, c in enumerate(calls)))
+    failed = sum(1 for r in results if "error" in r)
+    response = json.dumps(
+        {"succeeded": len(results) - failed, "failed": failed, "results": results},
+        **COMPACT,
+    )
+    telemetry.record_payload("mcp.call_tools_batch", len(response))
+    return response
+
+
+async def read_tool_result(result_id: str, item: int = 0, offset: int = 0) -> str:
+    """Read more of a truncated call_mcp_tool result.
+
+    Returns one page of content item ``item`` starting at byte ``offset``.
+    Pass the returned ``next`` values back in to continue; no ``next``
+    means the end of the result.
+
+    Args:
+        result_id: The ``result_id`` from a truncated tool result.
+        item:      Index of the content item to read.
+        offset:    Byte offset within that item.
+    """
+    try:
+        page = get_spill_store().read(result_id, item, offset, default_budget())
+    except (KeyError, IndexError) as exc:
+        return json.dumps({"error": exc.args[0]})
+    return json.dumps(page)
+
+
+async def get_endpoint_health(urls: list[str] | None = None) -> str:
+    """Report recent health of MCP endpoints this agent has called.
+
+    Use it to choose between servers that offer similar tools: prefer
+    ``closed`` (healthy) endpoints with a low error rate and latency.
+    ``open`` endpoints are failing and are skipped until they recover.
+
+    Args:
+        urls: Endpoint URLs to report on (default: all known endpoints).
+    """
+    return json.dumps(get_tracker().report(urls))
+
+
+async def search_catalog(query: str, kind: str | None = None, limit: int = 10) -> str:
+    """Search the MCP server catalog (local index, answers in milliseconds).
+
+    Use this instead of list_servers to find servers for a task.  Each
+    result is a compact summary: ``name``, ``kind`` ("remote" or "stdio"),
+    ``description``, the remote ``url`` or the ``package``, and any
+    ``required_env`` (config the server needs).  Remote results can be used
+    straight away with their ``url``; call get_server only for details the
+    summary lacks.
+
+    Args:
+        query: Keywords describing the capability (e.g. "github issues").
+        kind:  Only return "remote" or "stdio" servers (default: both).
+        limit: Max results (default 10).
+    """
+    return json.dumps(
+        await get_registry_catalog().search(query, max(1, min(limit, 50)), kind)
+    )
@@ -0,0 +1,426 @@
+"""Warm pool of deployed stdio MCP servers.
+
+A fresh stdio deployment needs 30-60 s of pod startup before its first
+handshake.  :class:`WarmPool` sits behind the agent's ``deploy_server``
+tool and avoids paying that again for servers the agent keeps asking for:
+
+  - every deploy request bumps the server's *demand*, a request count
+    that decays with a half-life of ``MCP_WARM_POOL_HALF_LIFE``;
+  - a request for a server that is already deployed (same version and
+    config) is answered at once, without touching the registry.  A warm
+    server that was ready but has not answered recently gets one
+    readiness probe first and is re-deployed if it stopped answering;
+  - servers whose demand reaches ``MCP_WARM_POOL_MIN_DEMAND`` (by default
+    about two recent requests) are kept deployed, and re-deployed in the
+    background if they were evicted;
+  - at most ``MCP_WARM_POOL_SIZE`` servers stay deployed.  Over budget,
+    the server with the lowest demand (then the longest idle) is removed.
+    Servers idle for ``MCP_WARM_POOL_IDLE_TTL`` are removed once their
+    demand falls below the threshold.
+
+A server counts as used whenever a tool lists or calls it (the tools wrap
+those calls in :meth:`WarmPool.using`), not only when it is deployed.  A
+server with a call in flight, or used within the last maintenance
+interval, is never evicted; over budget, the pool then stays above
+``MCP_WARM_POOL_SIZE`` until a later pass can evict.
+
+Deploying and removing go through a :class:`DeploymentBackend`.
+:class:`RegistryBackend` calls AgentRegistry's ``deploy_server`` and
+``remove_deployment`` MCP tools; tests can pass any other backend, e.g.
+one pointed at a local fake registry.
+
+Deploy config (which may hold API keys) is kept in memory only, so a
+server can be re-deployed with the config it was first given.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import math
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from .readiness import READY_TIMEOUT, wait_until_ready
+from .sessions import get_pool
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_MCP_URL = os.environ.get(
+    "REGISTRY_MCP_URL", "http://agentregistry.agentregistry.svc.cluster.local:8090/mcp"
+)
+DEFAULT_NAMESPACE = os.environ.get("MCP_SERVER_NAMESPACE", "agentregistry")
+DEFAULT_PORT = int(os.environ.get("MCP_SERVER_PORT", "3000"))
+WARM_POOL_SIZE = int(os.environ.get("MCP_WARM_POOL_SIZE", "4"))
+WARM_POOL_IDLE_TTL = float(os.environ.get("MCP_WARM_POOL_IDLE_TTL", "1800"))
+WARM_POOL_MIN_DEMAND = float(os.environ.get("MCP_WARM_POOL_MIN_DEMAND", "1.5"))
+WARM_POOL_HALF_LIFE = float(os.environ.get("MCP_WARM_POOL_HALF_LIFE", "86400"))
+WARM_POOL_INTERVAL = float(os.environ.get("MCP_WARM_POOL_INTERVAL", "60"))
+# Servers with demand this small are forgotten.
+_MIN_TRACKED_DEMAND = 0.01
+
+
+def _sanitize_k8s_name(name: str) -> str:
+    """Mirror AgentRegistry's sanitizeK8sName (Go) in Python.
+
+    Rules: lowercase → replace non-[a-z0-9] with '-' → collapse runs of '-'
+    → trim leading/trailing '-' → truncate to 63 chars.
+    """
+    name = name.lower()
+    name = re.sub(r"[^a-z0-9-]", "-", name)
+    name = re.sub(r"-+", "-", name)
+    return name.strip("-")[:63]
+
+
+def deployed_server_url(server_name: str) -> str:
+    """In-cluster MCP endpoint of a server deployed by AgentRegistry."""
+    sanitized = _sanitize_k8s_name(server_name)
+    return f"http://{sanitized}.{DEFAULT_NAMESPACE}.svc.cluster.local:{DEFAULT_PORT}/mcp"
+
+
+class DeployError(Exception):
+    """The backend rejected or failed a deploy or removal."""
+
+
+class DeploymentBackend(ABC):
+    """Deploys and removes stdio MCP servers."""
+
+    @abstractmethod
+    async def deploy(self, name: str, version: str, config: dict[str, Any]) -> str:
+        """Deploy ``name``; return the backend's response text."""
+
+    @abstractmethod
+    async def remove(self, name: str, version: str) -> None:
+        """Remove the deployment of ``name``."""
+
+    @abstractmethod
+    def url(self, name: str) -> str:
+        """Return the MCP endpoint a deployed ``name`` serves on."""
+
+
+class RegistryBackend(DeploymentBackend):
+    """Deploys to Kubernetes through AgentRegistry's MCP tools."""
+
+    def __init__(
+        self,
+        registry_url: str = REGISTRY_MCP_URL,
+        server_url: Callable[[str], str] = deployed_server_url,
+    ) -> None:
+        self.registry_url = registry_url
+        self._server_url = server_url
+
+    async def _call(self, tool: str, arguments: dict[str, Any]) -> str:
+        result = await get_pool().call(
+            self.registry_url, lambda s: s.call_tool(tool, arguments)
+        )
+        text = " ".join(
+            block.text for block in result.content if getattr(block, "text", None)
+        )
+        if result.isError:
+            raise DeployError(text or f"{tool} failed")
+        return text
+
+    async def deploy(self, name: str, version: str, config: dict[str, Any]) -> str:
+        arguments: dict[str, Any] = {
+            "serverName": name,
+            "version": version,
+            "runtime": "kubernetes",
+        }
+        if config:
+            arguments["config"] = config
+        return await self._call("deploy_server", arguments)
+
+    async def remove(self, name: str, version: str) -> None:
+        await self._call("remove_deployment", {"serverName": name, "version": version})
+
+    def url(self, name: str) -> str:
+        return self._server_url(name)
+
+
+@dataclass
+class Demand:
+    score: float = 0.0
+    updated: float = field(default_factory=time.monotonic)
+    # Arguments of the latest request, used to pre-deploy the server.
+    version: str = "latest"
+    config: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class WarmServer:
+    name: str
+    version: str
+    config: dict[str, Any]
+    url: str
+    deployed_at: float
+    last_used: float
+    ready: bool = False
+    in_use: int = 0  # tool calls in flight
+
+
+class WarmPool:
+    """Keeps the most requested stdio servers deployed, within a budget."""
+
+    def __init__(
+        self,
+        backend: DeploymentBackend,
+        size: int = WARM_POOL_SIZE,
+        idle_ttl: float = WARM_POOL_IDLE_TTL,
+        min_demand: float = WARM_POOL_MIN_DEMAND,
+        half_life: float = WARM_POOL_HALF_LIFE,
+        interval: float = WARM_POOL_INTERVAL,
+    ) -> None:
+        self.backend = backend
+        self.size = size
+        self.idle_ttl = idle_ttl
+        self.min_demand = min_demand
+        self.half_life = half_life
+        self.interval = interval
+        self.hits = 0
+        self.misses = 0
+        self.prewarms = 0
+        self.evictions = 0
+        self._servers: dict[str, WarmServer] = {}
+        self._demand: dict[str, Demand] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._maintainer: asyncio.Task | None = None
+
+    # -- Demand ----------------------------------------------------------------
+
+    def demand(self, name: str, now: float | None = None) -> float:
+        """Decayed number of deploy requests for ``name``."""
+        entry = self._demand.get(name)
+        if entry is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return entry.score * math.exp2(-(now - entry.updated) / self.half_life)
+
+    def _record(self, name: str, version: str, config: dict[str, Any]) -> None:
+        now = time.monotonic()
+        score = self.demand(name, now) + 1
+        self._demand[name] = Demand(score, now, version, config)
+
+    # -- Deploy ----------------------------------------------------------------
+
+    async def acquire(
+        self, name: str, version: str = "latest", config: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Return a deployment of ``name``, reusing a warm one if it matches.
+
+        Returns ``{"server_name", "url", "warm", "ready"}``; ``warm`` is True
+        when no deploy was needed.  Raises :class:`DeployError` if the
+        backend fails.
+        """
+        config = config or {}
+        self._record(name, version, config)
+        self._ensure_maintainer()
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            server = self._servers.get(name)
+            warm = (
+                server is not None
+                and server.version == version
+                and server.config == config
+                # A server that was ready must still answer (one probe at
+                # most); one still starting is handed back as is.
+                and not (
+                    server.ready and not (await wait_until_ready(server.url, 0)).ready
+                )
+            )
+            if warm:
+                self.hits += 1
+                server.last_used = time.monotonic()
+            else:
+                self.misses += 1
+                server = await self._deploy(name, version, config)
+        if not warm:
+            await self._enforce_budget(keep=name)
+        return {
+            "server_name": name,
+            "url": server.url,
+            "warm": warm,
+            "ready": server.ready,
+        }
+
+    async def _deploy(
+        self, name: str, version: str, config: dict[str, Any]
+    ) -> WarmServer:
+        """Deploy ``name`` (caller holds its lock) and start waiting for it."""
+        await self.backend.deploy(name, version, config)
+        now = time.monotonic()
+        server = WarmServer(name, version, config, self.backend.url(name), now, now)
+        self._servers[name] = server
+        self._spawn(self._await_ready(server))
+        return server
+
+    async def _await_ready(self, server: WarmServer) -> None:
+        result = await wait_until_ready(server.url, READY_TIMEOUT)
+        server.ready = result.ready
+        if not result.ready:
+            logger.warning("Warm server %s not ready: %s", server.name, result.last_error)
+
+    # -- Use -------------------------------------------------------------------
+
+    def _find(self, url: str) -> WarmServer | None:
+        for server in self._servers.values():
+            if server.url == url:
+                return server
+        return None
+
+    def touch(self, url: str) -> None:
+        """Mark the warm server at ``url`` (if any) as just used."""
+        server = self._find(url)
+        if server is not None:
+            server.last_used = time.monotonic()
+
+    @contextlib.contextmanager
+    def using(self, url: str) -> Iterator[None]:
+        """Hold the warm server at ``url`` (if any) in use for a block."""
+        server = self._find(url)
+        if server is None:
+            yield
+            return
+        server.in_use += 1
+        server.last_used = time.monotonic()
+        try:
+            yield
+        finally:
+            server.in_use -= 1
+            server.last_used = time.monotonic()
+
+    def _evictable(self, server: WarmServer, now: float) -> bool:
+        """False while ``server`` is in use or was used in the last interval."""
+        return server.in_use == 0 and now - server.last_used >= self.interval
+
+    # -- Removal ---------------------------------------------------------------
+
+    async def _remove(self, name: str, force: bool = False) -> None:
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            server = self._servers.get(name)
+            if server is None:
+                return
+            # Re-checked under the lock: a call may have started meanwhile.
+            if not force and not self._evictable(server, time.monotonic()):
+                return
+            del self._servers[name]
+            self.evictions += 1
+            try:
+                await self.backend.remove(name, server.version)
+            except Exception as exc:
+                logger.warning("Could not remove warm server %s: %s", name, exc)
+
+    async def _enforce_budget(self, keep: str | None = None) -> None:
+        while len(self._servers) > self.size:
+            now = time.monotonic()
+            candidates = [
+                s
+                for s in self._servers.values()
+                if s.name != keep and self._evictable(s, now)
+            ]
+            if not candidates:
+                return  # everything else is busy; retried by maintain()
+            victim = min(candidates, key=lambda s: (self.demand(s.name, now), s.last_used))
+            await self._remove(victim.name)
+
+    # -- Maintenance -----------------------------------------------------------
+
+    async def maintain(self) -> None:
+        """Evict idle, unpopular servers; pre-deploy popular missing ones."""
+        now = time.monotonic()
+        for name in [n for n in self._demand if self.demand(n, now) < _MIN_TRACKED_DEMAND]:
+            if name not in self._servers:
+                del self._demand[name]
+                lock = self._locks.get(name)
+                if lock is not None and not lock.locked():
+                    del self._locks[name]
+
+        for server in list(self._servers.values()):
+            idle = server.in_use == 0 and now - server.last_used > self.idle_ttl
+            if idle and self.demand(server.name, now) < self.min_demand:
+                await self._remove(server.name)
+        await self._enforce_budget()
+
+        wanted = sorted(
+            (n for n in self._demand if n not in self._servers),
+            key=lambda n: -self.demand(n, now),
+        )
+        for name in wanted[: max(0, self.size - len(self._servers))]:
+            if self.demand(name, now) < self.min_demand:
+                break
+            entry = self._demand[name]
+            async with self._locks.setdefault(name, asyncio.Lock()):
+                if name in self._servers:
+                    continue
+                try:
+                    await self._deploy(name, entry.version, entry.config)
+                except Exception as exc:
+                    logger.warning("Pre-deploy of %s failed: %s", name, exc)
+                    continue
+            self.prewarms += 1
+
+    def _ensure_maintainer(self) -> None:
+        if self._maintainer is None or self._maintainer.done():
+            self._maintainer = asyncio.create_task(
+                self._maintain_forever(), name="mcp-warm-pool"
+            )
+
+    async def _maintain_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.maintain()
+            except Exception:
+                logger.exception("Warm pool maintenance failed")
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self, remove: bool = False) -> None:
+        """Stop background work; with ``remove``, also undeploy every server."""
+        tasks = [*self._tasks, *([self._maintainer] if self._maintainer else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._maintainer = None
+        if remove:
+            for name in list(self._servers):
+                await self._remove(name, force=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "prewarms": self.prewarms,
+            "evictions": self.evictions,
+            "servers": {
+                s.name: {
+                    "version": s.version,
+                    "ready": s.ready,
+                    "idle_s": round(now - s.last_used),
+                    "in_use": s.in_use,
+                    "demand": round(self.demand(s.name, now), 2),
+                }
+                for s in self._servers.values()
+            },
+        }
+
+
+_pool: WarmPool | None = None
+
+
+def get_warm_pool() -> WarmPool:
+    """Return the process-wide warm pool (AgentRegistry backend)."""
+    global _pool
+    if _pool is None:
+        _pool = WarmPool(RegistryBackend())
+    return _pool
@@ -1,74 +1,217 @@
 #!/usr/bin/env python3
-"""Local agent diagnostics — reports environment and configuration."""
+"""Local agent diagnostics — reports environment, configuration and endpoint latency.
 
+Usage:
+    python3 scripts/diagnostics.py              # human-readable report
+    python3 scripts/diagnostics.py --json       # one JSON object on stdout
+    python3 scripts/diagnostics.py --no-probe   # skip the endpoint probes
+
+Endpoints (LLM gateway, OTLP collector, EverMemOS) are probed in parallel,
+measuring TCP connect time and time to the first response byte of a HEAD
+request.  Any HTTP status counts as reachable.  The whole probe stage is
+bounded by --timeout: an endpoint that has not answered by then (including
+a hung DNS lookup) is reported as timed out.
+"""
+
+import argparse
+import http.client
+import json
 import os
+import threading
+import time
 from pathlib import Path
+from urllib.parse import urlsplit
+
+from skills_index import SKILLS_DIR, load_index
 
 SA_PATH = "/var/run/secrets/kubernetes.io/serviceaccount"
-SKILLS_DIR = "/skills"
+PROBE_TIMEOUT = 2.0
 
+ENDPOINTS = {
+    "llm_gateway": os.environ.get(
+        "LLM_BASE_URL",
+        "http://agentgateway-proxy.agentgateway-system.svc.cluster.local",
+    ),
+    "otlp": os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT"),
+    "evermemos": os.environ.get(
+        "EVERMEMOS_URL", "http://evermemos.evermemos.svc.cluster.local:1995"
+    ),
+}
 
-def main():
+
+def scan_skills(skills_dir):
+    """Return ``[{"name", "scripts"}]`` for every mounted skill.
+
+    Uses the cached skills index (see skills_index.py): only ``stat`` calls
+    unless skills changed since the last run.
+    """
+    entries = load_index(skills_dir)
+    if entries is None:
+        return None
+    return [{"name": e["name"], "scripts": len(e["scripts"])} for e in entries]
+
+
+def probe(url, timeout=PROBE_TIMEOUT):
+    """Measure connect and time-to-first-byte for ``url`` (milliseconds).
+
+    ``timeout`` bounds connect and first byte together.
+    """
+    result = {"url": url, "reachable": False}
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        result["error"] = "unsupported URL"
+        return result
+    cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = cls(parts.hostname, parts.port, timeout=timeout)
+    started = time.perf_counter()
+    try:
+        conn.connect()
+        connected = time.perf_counter()
+        result["connect_ms"] = round((connected - started) * 1000, 1)
+        conn.sock.settimeout(max(0.001, timeout - (connected - started)))
+        conn.request("HEAD", parts.path or "/")
+        response = conn.getresponse()
+        result["ttfb_ms"] = round((time.perf_counter() - connected) * 1000, 1)
+        result["status"] = response.status
+        result["reachable"] = True
+    except (OSError, http.client.HTTPException) as exc:
+        result["error"] = str(exc) or type(exc).__name__
+    finally:
+        conn.close()
+    return result
+
+
+def probe_all(endpoints, timeout=PROBE_TIMEOUT):
+    """Probe every configured endpoint concurrently, all within ``timeout``.
+
+    Probes run on daemon threads, so one stuck in DNS never delays the
+    report or the process exit.
+    """
+    results = {}
+    threads = []
+    for name, url in endpoints.items():
+        if url:
+            thread = threading.Thread(
+                target=lambda n=name, u=url: results.__setitem__(n, probe(u, timeout)),
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    report = {}
+    for name, url in endpoints.items():
+        if not url:
+            report[name] = None
+        else:
+            report[name] = results.get(name) or {
+                "url": url,
+                "reachable": False,
+                "error": f"timed out after {timeout:g} s",
+            }
+    return report
+
+
+def collect(skills_dir, probes, timeout):
+    ns_file = Path(SA_PATH) / "namespace"
+    llm_keys = {}
+    for key in ["ANTHROPIC_API_KEY", "OPENAI_API_KEY"]:
+        val = os.environ.get(key)
+        if val:
+            llm_keys[key] = val[:8] + "..." if len(val) > 8 else "***"
+    return {
+        "agent": {
+            "name": os.environ.get("KAGENT_NAME", "unknown"),
+            "namespace": ns_file.read_text().strip() if ns_file.exists() else "unknown",
+            "controller_url": os.environ.get("KAGENT_URL", "unknown"),
+            "skills_folder": os.environ.get("KAGENT_SKILLS_FOLDER", "not set"),
+        },
+        "service_account": {
+            "token": Path(SA_PATH, "token").exists(),
+            "ca_cert": Path(SA_PATH, "ca.crt").exists(),
+        },
+        "skills": scan_skills(skills_dir),
+        "llm_keys": llm_keys,
+        "tracing": {
+            "enabled": os.environ.get("OTEL_TRACING_ENABLED", "false"),
+            "otlp_endpoint": os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "not configured"),
+        },
+        "endpoints": probe_all(ENDPOINTS, timeout) if probes else None,
+    }
+
+
+def print_report(report):
     print("=" * 55)
     print("  Agent Environment Diagnostics")
     print("=" * 55)
     print()
 
-    # Namespace and identity
-    ns_file = Path(SA_PATH) / "namespace"
-    namespace = ns_file.read_text().strip() if ns_file.exists() else "unknown"
-    agent_name = os.environ.get("KAGENT_NAME", "unknown")
-    agent_url = os.environ.get("KAGENT_URL", "unknown")
-
-    print(f"  Agent Name:     {agent_name}")
-    print(f"  Namespace:      {namespace}")
-    print(f"  Controller URL: {agent_url}")
-    print(f"  Skills Folder:  {os.environ.get('KAGENT_SKILLS_FOLDER', 'not set')}")
+    agent = report["agent"]
+    print(f"  Agent Name:     {agent['name']}")
+    print(f"  Namespace:      {agent['namespace']}")
+    print(f"  Controller URL: {agent['controller_url']}")
+    print(f"  Skills Folder:  {agent['skills_folder']}")
     print()
 
-    # Service account
-    token_exists = Path(SA_PATH, "token").exists()
-    ca_exists = Path(SA_PATH, "ca.crt").exists()
-    print(f"  SA Token:       {'present' if token_exists else 'MISSING'}")
-    print(f"  CA Cert:        {'present' if ca_exists else 'MISSING'}")
+    sa = report["service_account"]
+    print(f"  SA Token:       {'present' if sa['token'] else 'MISSING'}")
+    print(f"  CA Cert:        {'present' if sa['ca_cert'] else 'MISSING'}")
     print()
 
-    # Loaded skills
-    skills_path = Path(SKILLS_DIR)
-    if skills_path.exists():
-        skills = []
-        for d in sorted(skills_path.iterdir()):
-            if d.is_dir() and (d / "SKILL.md").exists():
-                skills.append(d.name)
+    skills = report["skills"]
+    if skills is None:
+        print("  Loaded Skills:  none (skills directory not found)")
+    else:
         print(f"  Loaded Skills:  {len(skills)}")
         for s in skills:
-            scripts_dir = skills_path / s / "scripts"
-            script_count = len(list(scripts_dir.iterdir())) if scripts_dir.exists() else 0
-            print(f"    - {s} ({script_count} script(s))")
-    else:
-        print("  Loaded Skills:  none (skills directory not found)")
+            print(f"    - {s['name']} ({s['scripts']} script(s))")
     print()
 
-    # LLM configuration
     print("  LLM Config:")
-    for key in ["ANTHROPIC_API_KEY", "OPENAI_API_KEY"]:
-        val = os.environ.get(key)
-        if val:
-            masked = val[:8] + "..." if len(val) > 8 else "***"
-            print(f"    {key}: {masked}")
+    for key, masked in report["llm_keys"].items():
+        print(f"    {key}: {masked}")
     print()
 
-    # Tracing
-    otel_endpoint = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "not configured")
-    tracing = os.environ.get("OTEL_TRACING_ENABLED", "false")
-    print(f"  Tracing:        {tracing}")
-    print(f"  OTLP Endpoint:  {otel_endpoint}")
+    print(f"  Tracing:        {report['tracing']['enabled']}")
+    print(f"  OTLP Endpoint:  {report['tracing']['otlp_endpoint']}")
     print()
 
+    if report["endpoints"] is not None:
+        print("  Endpoints:")
+        for name, r in report["endpoints"].items():
+            if r is None:
+                print(f"    {name:<12} not configured")
+            elif r["reachable"]:
+                print(
+                    f"    {name:<12} OK   connect {r['connect_ms']} ms, "
+                    f"first byte {r['ttfb_ms']} ms (HTTP {r['status']})"
+                )
+            else:
+                print(f"    {name:<12} FAIL {r['error']} ({r['url']})")
+        print()
+
     print("=" * 55)
     print("  Diagnostics complete")
     print("=" * 55)
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Local agent diagnostics")
+    parser.add_argument("--json", action="store_true", help="print one JSON object")
+    parser.add_argument("--no-probe", action="store_true", help="skip endpoint probes")
+    parser.add_argument(
+        "--timeout", type=float, default=PROBE_TIMEOUT, help="per-probe timeout (seconds)"
+    )
+    parser.add_argument("--skills-dir", default=SKILLS_DIR)
+    args = parser.parse_args()
+
+    report = collect(args.skills_dir, not args.no_probe, args.timeout)
+    if args.json:
+        print(json.dumps(report, separators=(",", ":")))
+    else:
+        print_report(report)
+
+
 if __name__ == "__main__":
     main()
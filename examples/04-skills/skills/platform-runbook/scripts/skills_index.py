@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Compact manifest index of the mounted skills, with lazy SKILL.md loading.
+
+Usage:
+    python3 scripts/skills_index.py               # one line per skill: name, description
+    python3 scripts/skills_index.py list --json   # the index entries as JSON
+    python3 scripts/skills_index.py show <name>   # full SKILL.md body of one skill
+    python3 scripts/skills_index.py build         # force a full rebuild
+
+The index is one JSON file (SKILLS_INDEX, default /tmp/skills-index.json)
+holding, per skill: its SKILL.md front-matter (name, description), the
+script inventory, and size + SHA-256 of SKILL.md and every script.
+
+Loading the index does not read any SKILL.md.  It is checked against the
+skills directory with ``stat`` calls only (size and mtime of SKILL.md and
+of every script).  Only skills that were added or changed are
+parsed again, and the index is rewritten only if something changed.
+Bodies are read on demand by ``show``.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+SKILLS_DIR = "/skills"
+SKILLS_INDEX = os.environ.get("SKILLS_INDEX", "/tmp/skills-index.json")
+INDEX_VERSION = 2
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _signature(skill_path):
+    """Cheap change detector: size/mtime of SKILL.md and of every script.
+
+    A directory's mtime only changes when entries are added, removed or
+    renamed, so each script is stat'ed too (one scandir, no reads).
+    """
+    st = os.stat(os.path.join(skill_path, "SKILL.md"))
+    scripts = []
+    try:
+        with os.scandir(os.path.join(skill_path, "scripts")) as it:
+            for entry in it:
+                if entry.is_file():
+                    script_st = entry.stat()
+                    scripts.append(
+                        [entry.name, script_st.st_size, script_st.st_mtime_ns]
+                    )
+    except OSError:
+        pass
+    scripts.sort()
+    return [st.st_size, st.st_mtime_ns, scripts]
+
+
+def split_front_matter(text):
+    """Return ``(front_matter, body)``; front matter as a dict of strings."""
+    if not text.startswith("---"):
+        return {}, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+    meta = {}
+    for line in text[3:end].splitlines():
+        key, sep, value = line.partition(":")
+        if sep and key.strip() and not line.startswith((" ", "\t")):
+            meta[key.strip()] = value.strip().strip("\"'")
+    body_start = text.find("\n", end + 4)
+    return meta, text[body_start + 1 :] if body_start != -1 else ""
+
+
+def build_entry(skill_path):
+    """Parse one skill directory into an index entry."""
+    skill_md = os.path.join(skill_path, "SKILL.md")
+    with open(skill_md, encoding="utf-8") as f:
+        text = f.read()
+    meta, _ = split_front_matter(text)
+    scripts = []
+    try:
+        with os.scandir(os.path.join(skill_path, "scripts")) as it:
+            for entry in it:
+                if entry.is_file():
+                    scripts.append(
+                        {
+                            "name": entry.name,
+                            "size": entry.stat().st_size,
+                            "sha256": _sha256(entry.path),
+                        }
+                    )
+    except OSError:
+        pass
+    scripts.sort(key=lambda s: s["name"])
+    return {
+        "dir": os.path.basename(skill_path),
+        "name": meta.get("name") or os.path.basename(skill_path),
+        "description": meta.get("description", ""),
+        "skill_md": {
+            "size": len(text.encode("utf-8")),
+            "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        },
+        "scripts": scripts,
+        "signature": _signature(skill_path),
+    }
+
+
+def _read_index(path, skills_dir):
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get("version") != INDEX_VERSION or index.get("skills_dir") != skills_dir:
+        return {}
+    return {entry["dir"]: entry for entry in index.get("skills", [])}
+
+
+def _write_index(path, skills_dir, entries):
+    index = {"version": INDEX_VERSION, "skills_dir": skills_dir, "skills": entries}
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".skills-index-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only location: the index is still returned, just not cached
+
+
+def load_index(skills_dir=SKILLS_DIR, path=SKILLS_INDEX, rebuild=False):
+    """Return the list of index entries, refreshing stale ones.
+
+    Returns None if ``skills_dir`` does not exist.
+    """
+    cached = {} if rebuild else _read_index(path, skills_dir)
+    entries = []
+    changed = rebuild
+    try:
+        it = os.scandir(skills_dir)
+    except OSError:
+        return None
+    with it:
+        for dirent in it:
+            if not dirent.is_dir():
+                continue
+            try:
+                signature = _signature(dirent.path)
+            except OSError:
+                continue  # no SKILL.md: not a skill
+            entry = cached.pop(dirent.name, None)
+            if entry is None or entry.get("signature") != signature:
+                entry = build_entry(dirent.path)
+                changed = True
+            entries.append(entry)
+    changed = changed or bool(cached)  # skills were removed
+    entries.sort(key=lambda e: e["name"])
+    if changed:
+        _write_index(path, skills_dir, entries)
+    return entries
+
+
+def read_body(skills_dir, entry):
+    """Read a skill's SKILL.md body (front matter stripped) on demand.
+
+    Raises ValueError if the file no longer matches the indexed hash.
+    """
+    with open(os.path.join(skills_dir, entry["dir"], "SKILL.md"), encoding="utf-8") as f:
+        text = f.read()
+    if hashlib.sha256(text.encode("utf-8")).hexdigest() != entry["skill_md"]["sha256"]:
+        raise ValueError(f"SKILL.md of {entry['name']} changed since it was indexed")
+    return split_front_matter(text)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skills manifest index")
+    parser.add_argument("command", nargs="?", default="list", choices=["list", "show", "build"])
+    parser.add_argument("name", nargs="?", help="skill name (for show)")
+    parser.add_argument("--json", action="store_true", help="list: print index entries as JSON")
+    parser.add_argument("--skills-dir", default=SKILLS_DIR)
+    parser.add_argument("--index", default=SKILLS_INDEX, help="index file path")
+    args = parser.parse_args()
+
+    entries = load_index(args.skills_dir, args.index, rebuild=args.command == "build")
+    if entries is None:
+        sys.exit(f"skills directory {args.skills_dir} not found")
+
+    if args.command == "show":
+        match = [e for e in entries if args.name in (e["name"], e["dir"])]
+        if not match:
+            sys.exit(f"unknown skill {args.name!r}")
+        try:
+            body = read_body(args.skills_dir, match[0])
+        except ValueError:
+            # Changed between the index check and now: reindex and retry once.
+            entries = load_index(args.skills_dir, args.index, rebuild=True)
+            body = read_body(args.skills_dir, next(e for e in entries if e["dir"] == match[0]["dir"]))
+        print(body, end="")
+    elif args.json:
+        print(json.dumps(entries, separators=(",", ":")))
+    elif args.command == "build":
+        print(f"indexed {len(entries)} skill(s) -> {args.index}")
+    else:
+        for e in entries:
+            print(f"{e['name']}: {e['description']} ({len(e['scripts'])} script(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
 """BYO ADK agent: personal assistant with long-term memory via EverMemOS.
 
 Memory integration happens transparently through ADK callbacks:
-  - before_model_callback: stores the user message, retrieves relevant
-    memories, and injects them into the system instruction.
-  - after_model_callback: stores the assistant's response.
+  - before_model_callback: queues the user message for storage, retrieves
+    relevant memories, and injects them ahead of the user's latest message.
+  - after_model_callback: queues the assistant's response for storage.
 
-The agent itself sees an enriched system prompt with memory context --
-no explicit memory tools are needed for the basic flow.
+Message storage goes through a write-behind queue (``writer.py``) so it
+never adds EverMemOS latency to a turn.  The agent is served as an ADK
+``App`` whose plugin flushes that queue when the server shuts down.
+
+The agent itself sees its memory context next to the user's message --
+no explicit memory tools are needed for the basic flow.  The system
+instruction never changes, so it stays a prompt-cache hit on every turn
+(``promptcache.py``).
 """
 
 from __future__ import annotations
@@ -15,19 +21,31 @@ import logging
 import os
 
 from google.adk.agents import Agent
+from google.adk.apps import App
 from google.adk.models.lite_llm import LiteLlm
+from google.adk.plugins import BasePlugin
 from google.genai import types
 
-from . import memory
+from . import memory, meta, prefetch, promptcache, writer
 
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
 # Configuration (from environment)
 # ---------------------------------------------------------------------------
-USER_ID = os.environ.get("MEMORY_USER_ID", "user")
+# Setting MEMORY_USER_ID pins every request to one user (single-user mode).
+# Left unset, the user is resolved per request -- see resolve_identity().
+PINNED_USER_ID = os.environ.get("MEMORY_USER_ID")
+PINNED_GROUP_ID = os.environ.get("MEMORY_GROUP_ID")
+DEFAULT_USER_ID = "user"
 ASSISTANT_ID = os.environ.get("MEMORY_ASSISTANT_ID", "assistant")
-GROUP_ID = os.environ.get("MEMORY_GROUP_ID", f"assistant_{USER_ID}")
+
+# Session-state keys that override the resolved identity.  Clients can write
+# session state, so the override is off unless MEMORY_STATE_IDENTITY=true
+# (e.g. behind a trusted front end that sets it).
+STATE_IDENTITY = os.environ.get("MEMORY_STATE_IDENTITY", "false").lower() == "true"
+USER_ID_STATE_KEY = "memory_user_id"
+GROUP_ID_STATE_KEY = "memory_group_id"
 
 # ---------------------------------------------------------------------------
 # LLM — Claude via AgentGateway proxy
@@ -39,16 +57,38 @@ model = LiteLlm(
         "http://agentgateway-proxy.agentgateway-system.svc.cluster.local"
         "/llm/default/anthropic",
     ),
+    **promptcache.model_kwargs(),
 )
 
 # ---------------------------------------------------------------------------
-# Set up conversation metadata on import (idempotent)
+# Identity — one replica serves many users
 # ---------------------------------------------------------------------------
-try:
-    memory.set_conversation_meta(GROUP_ID, USER_ID, ASSISTANT_ID)
-    logger.info("Conversation meta set: group_id=%s", GROUP_ID)
-except Exception as exc:
-    logger.warning("Could not set conversation meta (may already exist): %s", exc)
+
+
+def resolve_identity(callback_context) -> tuple[str, str]:
+    """Return ``(user_id, group_id)`` for the current request.
+
+    Precedence for the user: ``MEMORY_USER_ID`` (pinned) > session state
+    ``memory_user_id`` (only with ``MEMORY_STATE_IDENTITY=true``) > the ADK
+    session's user_id.  The group is ``MEMORY_GROUP_ID`` (pinned) > session
+    state ``memory_group_id`` (same opt-in) > ``assistant_<user_id>``.
+
+    All per-user state downstream (caches, prefetch, meta registry) is held
+    in bounded LRU structures, so the number of distinct users only affects
+    hit rates, not memory.
+    """
+    state = callback_context.state if STATE_IDENTITY else {}
+    user_id = (
+        PINNED_USER_ID
+        or state.get(USER_ID_STATE_KEY)
+        or getattr(callback_context, "user_id", None)
+        or DEFAULT_USER_ID
+    )
+    group_id = (
+        PINNED_GROUP_ID or state.get(GROUP_ID_STATE_KEY) or f"assistant_{user_id}"
+    )
+    return user_id, group_id
+
 
 # ---------------------------------------------------------------------------
 # Callbacks — transparent memory integration
@@ -59,7 +99,9 @@ You are a helpful personal assistant with long-term memory.
 You remember details about the user from previous conversations and use that
 context to provide personalized, relevant responses.
 
-{memory_context}
+Each user message may be preceded by what you remember about the user from
+previous conversations. That memory is context for you, not something the
+user wrote.
 
 Guidelines:
 - Reference memories naturally, don't list them mechanically
@@ -69,73 +111,110 @@ Guidelines:
 """
 
 
-def before_model_callback(callback_context, llm_request):
-    """Store the user message and inject memory context into the system prompt.
+async def before_agent_callback(callback_context):
+    """Set up conversation meta on first use and start prefetch (opt-in).
+
+    Both run in the background; the writer waits for a group's meta setup
+    before storing its messages.
+    """
+    user_id, group_id = resolve_identity(callback_context)
+    meta.ensure(group_id, user_id, ASSISTANT_ID)
+    if prefetch.PREFETCH_ENABLED:
+        prefetch.get_prefetcher().on_session_start(
+            callback_context.session.id, user_id
+        )
+    return None
+
+
+async def before_model_callback(callback_context, llm_request):
+    """Store the user message and inject memory context ahead of it.
 
     Flow:
       1. Extract the latest user message from the LLM request
-      2. Store it in EverMemOS for future memory extraction
+      2. Queue it for storage in EverMemOS (write-behind, see writer.py)
       3. Retrieve relevant memories (profile + episodic search)
-      4. Inject the memory context into the system instruction
+      4. Prepend the memory context to that message as a separate part
+
+    The system instruction is left as ``BASE_INSTRUCTION`` so the prompt
+    prefix stays byte-identical across turns and users (see promptcache.py).
     """
     # Extract latest user message
     user_message = None
+    user_index = None
     if llm_request.contents:
-        for content in reversed(llm_request.contents):
+        for index in range(len(llm_request.contents) - 1, -1, -1):
+            content = llm_request.contents[index]
             if content.role == "user" and content.parts:
                 user_message = content.parts[0].text
+                user_index = index
                 break
 
     if not user_message:
         return None  # proceed without modification
 
-    # Store the user message (fire-and-forget -- don't block on extraction)
-    try:
-        memory.store_message(
-            group_id=GROUP_ID,
-            sender=USER_ID,
-            content=user_message,
-            role="user",
-            sender_name=USER_ID,
-        )
-    except Exception as exc:
-        logger.warning("Failed to store user message: %s", exc)
+    user_id, group_id = resolve_identity(callback_context)
 
-    # Retrieve memory context
-    memory_context = memory.retrieve_context(query=user_message, user_id=USER_ID)
+    # Queue the user message for storage (write-behind -- never blocks)
+    writer.submit(
+        group_id=group_id,
+        sender=user_id,
+        content=user_message,
+        role="user",
+        sender_name=user_id,
+    )
 
-    # Inject into system instruction
-    enriched_instruction = BASE_INSTRUCTION.format(memory_context=memory_context)
-    llm_request.config.system_instruction = types.Content(
-        role="system",
-        parts=[types.Part(text=enriched_instruction)],
+    # Retrieve memory context (falling back to prefetched results if enabled)
+    if prefetch.PREFETCH_ENABLED:
+        memory_context = await prefetch.get_prefetcher().aretrieve_context(
+            query=user_message, user_id=user_id
+        )
+    else:
+        memory_context = await memory.aretrieve_context(
+            query=user_message, user_id=user_id
+        )
+
+    # Inject as the first part of the latest user turn.  A new Content, so
+    # the session's stored event is not modified.
+    content = llm_request.contents[user_index]
+    llm_request.contents[user_index] = types.Content(
+        role="user",
+        parts=[types.Part(text=memory_context), *content.parts],
     )
 
     return None  # proceed with the (modified) request
 
 
-def after_model_callback(callback_context, llm_response):
-    """Store the assistant's response in EverMemOS for future memory extraction."""
+def _text(content: types.Content | None) -> str:
+    """Join the text parts of a Content (empty string if there are none)."""
+    if not content or not content.parts:
+        return ""
+    return "\n".join(p.text for p in content.parts if p.text)
+
+
+async def after_model_callback(callback_context, llm_response):
+    """Record prompt-cache usage and queue the response for storage in EverMemOS."""
+    if llm_response:
+        promptcache.record(llm_response.usage_metadata)
     if not llm_response or not llm_response.content:
         return llm_response
 
     # Extract text from the response
-    assistant_text = ""
-    if llm_response.content.parts:
-        text_parts = [p.text for p in llm_response.content.parts if p.text]
-        assistant_text = "\n".join(text_parts)
+    assistant_text = _text(llm_response.content)
 
     if assistant_text:
-        try:
-            memory.store_message(
-                group_id=GROUP_ID,
-                sender=ASSISTANT_ID,
-                content=assistant_text,
-                role="assistant",
-                sender_name="Personal Assistant",
+        user_id, group_id = resolve_identity(callback_context)
+        writer.submit(
+            group_id=group_id,
+            sender=ASSISTANT_ID,
+            content=assistant_text,
+            role="assistant",
+            sender_name="Personal Assistant",
+            user_id=user_id,
+        )
+        if prefetch.PREFETCH_ENABLED:
+            prefetch.get_prefetcher().speculate(
+                user_id, _text(callback_context.user_content), assistant_text
             )
-        except Exception as exc:
-            logger.warning("Failed to store assistant response: %s", exc)
 
     return llm_response
 
@@ -150,9 +229,34 @@ root_agent = Agent(
         "A personal assistant that uses EverMemOS for long-term memory. "
         "Remembers user preferences, past conversations, and context across sessions."
     ),
-    instruction=BASE_INSTRUCTION.format(
-        memory_context="Memory context will be injected dynamically before each response."
-    ),
+    instruction=BASE_INSTRUCTION,
+    before_agent_callback=before_agent_callback,
     before_model_callback=before_model_callback,
     after_model_callback=after_model_callback,
 )
+
+
+# ---------------------------------------------------------------------------
+# App — flushes pending memory writes on shutdown
+# ---------------------------------------------------------------------------
+class MemoryShutdownPlugin(BasePlugin):
+    """Drains the write-behind queue and closes EverMemOS clients.
+
+    ADK calls ``close()`` when the runner is closed, which the API server
+    does on shutdown.  Anything the writer cannot store in time is left to
+    its ``atexit`` hook.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(name="memory_shutdown")
+
+    async def close(self) -> None:
+        await writer.get_writer().aclose()
+        await memory.aclose()
+
+
+app = App(
+    name="personal_assistant",
+    root_agent=root_agent,
+    plugins=[MemoryShutdownPlugin()],
+)
@@ -0,0 +1,353 @@
+"""In-process caches for EverMemOS reads.
+
+- :class:`LRUCache` -- a size-capped mapping that evicts least-recently-used
+  entries.  The building block for every bounded per-user structure here.
+- :class:`ProfileCache` -- TTL cache for profile memories with
+  stale-while-revalidate and explicit invalidation.
+- :class:`QueryCache` -- per-user cache of search results, matching exact
+  and normalized queries, and optionally near-duplicate (word-shingle) ones.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Mapping capped at ``maxsize`` entries, evicting least recently used."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        return self._data.pop(key, default)
+
+    def items(self) -> Iterator[tuple[K, V]]:
+        return iter(list(self._data.items()))
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# -- Profiles ----------------------------------------------------------------
+
+ProfileKey = tuple[str, str | None]  # (user_id, group_id)
+ProfileFetcher = Callable[[str, str | None], Awaitable[list[dict[str, Any]]]]
+
+
+@dataclass
+class _ProfileEntry:
+    memories: list[dict[str, Any]]
+    fetched_at: float
+    stale: bool = False
+
+
+@dataclass
+class ProfileCacheStats:
+    hits: int = 0
+    stale_hits: int = 0  # served stale while a refresh ran in the background
+    misses: int = 0
+    refreshes: int = 0
+    invalidations: int = 0
+
+
+class ProfileCache:
+    """TTL + LRU cache of profile memories keyed by ``(user_id, group_id)``.
+
+    - Younger than ``ttl``: served from cache.
+    - Older than ``ttl`` (or invalidated) but younger than ``max_stale``:
+      served from cache while a background refresh runs.
+    - Otherwise: fetched inline.
+
+    Invalidation is debounced by ``min_refresh``: an invalidated entry
+    younger than that is still treated as fresh, so a chatty session
+    triggers at most one refresh per ``min_refresh`` seconds rather than
+    one per stored message.
+
+    Concurrent reads of the same key share one in-flight fetch, and a
+    caller that gives up (e.g. a retrieval deadline) does not cancel it --
+    the result still lands in the cache for the next turn.
+    """
+
+    def __init__(
+        self,
+        fetch: ProfileFetcher,
+        maxsize: int,
+        ttl: float,
+        max_stale: float,
+        min_refresh: float = 0.0,
+    ) -> None:
+        self._fetch = fetch
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.min_refresh = min_refresh
+        self.stats = ProfileCacheStats()
+        self._entries: LRUCache[ProfileKey, _ProfileEntry] = LRUCache(maxsize)
+        self._inflight: dict[ProfileKey, asyncio.Task] = {}
+        # Keys invalidated while a fetch was in flight; that fetch may
+        # predate the new messages, so its result is stored as stale.
+        self._dirty: set[ProfileKey] = set()
+
+    async def get(
+        self, user_id: str, group_id: str | None = None
+    ) -> list[dict[str, Any]]:
+        key = (user_id, group_id)
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl and (not entry.stale or age < self.min_refresh):
+                self.stats.hits += 1
+                return entry.memories
+            if age < self.max_stale:
+                self.stats.stale_hits += 1
+                self._refresh(key)
+                return entry.memories
+        self.stats.misses += 1
+        return await asyncio.shield(self._refresh(key))
+
+    def invalidate(
+        self, user_id: str | None = None, group_id: str | None = None
+    ) -> None:
+        """Mark entries for ``user_id`` or ``group_id`` stale.
+
+        Stale entries are still served (up to ``max_stale``) but trigger a
+        background refresh on the next read.
+        """
+        for key, entry in self._entries.items():
+            if (user_id and key[0] == user_id) or (group_id and key[1] == group_id):
+                entry.stale = True
+                self.stats.invalidations += 1
+        for key in self._inflight:
+            if (user_id and key[0] == user_id) or (group_id and key[1] == group_id):
+                self._dirty.add(key)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "size": len(self._entries),
+            "evictions": self._entries.evictions,
+        }
+
+    def _refresh(self, key: ProfileKey) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._load(key))
+            # Attached once per fetch, however many readers share it.
+            task.add_done_callback(_log_refresh_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: ProfileKey) -> list[dict[str, Any]]:
+        started = time.monotonic()
+        try:
+            memories = await self._fetch(*key)
+            stale = key in self._dirty
+        finally:
+            self._inflight.pop(key, None)
+            self._dirty.discard(key)
+        self.stats.refreshes += 1
+        self._entries.set(key, _ProfileEntry(memories, started, stale))
+        return memories
+
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Profile refresh failed: %s", task.exception())
+
+
+# -- Search queries ----------------------------------------------------------
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+
+# Words a near-duplicate query may add, drop, or reorder.  Every other word
+# must appear in both queries: "...in march" and "...in april" differ.
+_STOPWORDS = frozenset(
+    "a an and are about as at be by can could did do does for from had has "
+    "have how i in is it me my of on or please so that the there this to "
+    "tell was we were what when where which who why will with would you "
+    "your".split()
+)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip punctuation, and collapse whitespace."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def shingles(normalized: str) -> frozenset:
+    """Unigrams plus word bigrams -- cheap, order-aware enough for rephrasings."""
+    tokens = normalized.split()
+    return frozenset(tokens) | frozenset(zip(tokens, tokens[1:]))
+
+
+def keywords(normalized: str) -> frozenset:
+    """The words of a normalized query that are not :data:`_STOPWORDS`."""
+    return frozenset(normalized.split()) - _STOPWORDS
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two shingle sets (0.0 when either is empty)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class _QueryEntry:
+    normalized: str
+    shingles: frozenset
+    keywords: frozenset
+    memories: list[dict[str, Any]]
+    created_at: float
+
+
+@dataclass
+class QueryCacheStats:
+    hits: int = 0  # exact / normalized match
+    near_hits: int = 0  # same keywords, shingle similarity >= threshold
+    misses: int = 0
+    invalidations: int = 0
+
+
+class QueryCache:
+    """Per-user cache of recent ``search_memories`` results.
+
+    Entries are grouped by ``(user_id, scope)``, where ``scope`` captures
+    every other search parameter (group, method, top_k, memory types), so
+    results are only reused for an identical search.  A lookup matches on
+    the normalized query.  With ``0 < similarity <= 1`` it may also match a
+    near-duplicate: an entry with exactly the same keywords (words other
+    than stopwords) and a word-shingle Jaccard score at or above
+    ``similarity``.  Near-duplicate matching is off by default, since
+    queries that differ in one word usually want different memories.
+
+    Memory is bounded by ``max_users`` x ``per_user`` entries.
+
+    Invalidation drops entries older than ``min_refresh`` seconds; younger
+    ones are kept because EverMemOS extracts memories asynchronously, so a
+    search that recent could not have seen the new messages anyway.
+    """
+
+    def __init__(
+        self,
+        max_users: int,
+        per_user: int,
+        ttl: float,
+        similarity: float,
+        min_refresh: float = 0.0,
+    ) -> None:
+        self.per_user = per_user
+        self.ttl = ttl
+        self.similarity = similarity
+        self.min_refresh = min_refresh
+        self.stats = QueryCacheStats()
+        self._users: LRUCache[tuple[str, Hashable], list[_QueryEntry]] = LRUCache(
+            max_users
+        )
+
+    def get(
+        self, user_id: str, scope: Hashable, query: str
+    ) -> list[dict[str, Any]] | None:
+        entries = self._live_entries((user_id, scope))
+        normalized = normalize_text(query)
+        for entry in entries:
+            if entry.normalized == normalized:
+                self.stats.hits += 1
+                return entry.memories
+        if entries and 0 < self.similarity <= 1:
+            query_keywords = keywords(normalized)
+            candidates = [e for e in entries if e.keywords == query_keywords]
+            if candidates:
+                query_shingles = shingles(normalized)
+                best = max(
+                    candidates, key=lambda e: jaccard(query_shingles, e.shingles)
+                )
+                if jaccard(query_shingles, best.shingles) >= self.similarity:
+                    self.stats.near_hits += 1
+                    return best.memories
+        self.stats.misses += 1
+        return None
+
+    def put(
+        self,
+        user_id: str,
+        scope: Hashable,
+        query: str,
+        memories: list[dict[str, Any]],
+    ) -> None:
+        key = (user_id, scope)
+        normalized = normalize_text(query)
+        entries = [e for e in self._live_entries(key) if e.normalized != normalized]
+        entries.append(
+            _QueryEntry(
+                normalized,
+                shingles(normalized),
+                keywords(normalized),
+                memories,
+                time.monotonic(),
+            )
+        )
+        self._users.set(key, entries[-self.per_user :])
+
+    def invalidate(
+        self, user_id: str | None = None, group_id: str | None = None
+    ) -> None:
+        """Drop entries for ``user_id`` (or any user in ``group_id``).
+
+        ``scope[0]`` is the group_id the search was issued with.
+        """
+        cutoff = time.monotonic() - self.min_refresh
+        for key, entries in self._users.items():
+            user, scope = key
+            scope_group = scope[0] if isinstance(scope, tuple) and scope else None
+            if (user_id and user == user_id) or (group_id and scope_group == group_id):
+                kept = [e for e in entries if e.created_at > cutoff]
+                self.stats.invalidations += len(entries) - len(kept)
+                entries[:] = kept
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **asdict(self.stats),
+            "users": len(self._users),
+            "evictions": self._users.evictions,
+        }
+
+    def _live_entries(self, key: tuple[str, Hashable]) -> list[_QueryEntry]:
+        entries = self._users.get(key)
+        if not entries:
+            return []
+        cutoff = time.monotonic() - self.ttl
+        return [e for e in entries if e.created_at > cutoff]
@@ -0,0 +1,142 @@
+"""Token-budgeted assembly of the memory block injected into the prompt.
+
+Retrieved memories (profile + search) are deduplicated, ranked, and packed
+into a fixed token budget.  The block is injected as a part ahead of the
+latest user message (the system instruction never changes, see
+``promptcache.py``), so that message -- and with it LLM latency and cost --
+stays bounded as a user's memory grows.
+
+Token counts use a fast local estimate (characters / ``CHARS_PER_TOKEN``)
+rather than a real tokenizer; it only needs to be right to within a few
+percent to keep the block under budget.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any
+
+from .cache import jaccard, normalize_text, shingles
+
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("MEMORY_CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_DEDUP_SIMILARITY = float(
+    os.environ.get("MEMORY_CONTEXT_DEDUP_SIMILARITY", "0.9")
+)
+CHARS_PER_TOKEN = 4
+# Below this many spare tokens a memory is dropped rather than truncated.
+MIN_TRUNCATED_TOKENS = 16
+
+HEADER = "Here is what you remember about this user from previous conversations:"
+EMPTY = "You don't have any prior memories about this user yet."
+
+_TIME_FIELDS = ("timestamp", "updated_at", "created_at", "create_time")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class ContextStats:
+    """Per-build (and, in :data:`totals`, cumulative) packing counts."""
+
+    candidates: int = 0
+    duplicates: int = 0  # near-identical or empty
+    included: int = 0
+    truncated: int = 0
+    dropped: int = 0  # did not fit the budget
+    tokens: int = 0
+
+    def add(self, other: ContextStats) -> None:
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+
+# Cumulative counts across every build in this process.
+totals = ContextStats()
+
+
+def _content(mem: dict[str, Any]) -> str:
+    return (mem.get("memory_content") or mem.get("content") or "").strip()
+
+
+def _recency(mem: dict[str, Any]) -> float:
+    for name in _TIME_FIELDS:
+        value = mem.get(name)
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                continue
+    return 0.0
+
+
+def rank(memories: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Profile facts first, then by score (desc), then recency (desc)."""
+    return sorted(
+        memories,
+        key=lambda m: (
+            m.get("memory_type") != "profile",
+            -float(m.get("score") or 0.0),
+            -_recency(m),
+        ),
+    )
+
+
+def dedup(
+    memories: list[dict[str, Any]], similarity: float = CONTEXT_DEDUP_SIMILARITY
+) -> list[dict[str, Any]]:
+    """Drop empty and near-identical memories, keeping the first occurrence."""
+    kept: list[dict[str, Any]] = []
+    seen: list[tuple[str, frozenset]] = []
+    for mem in memories:
+        normalized = normalize_text(_content(mem))
+        if not normalized:
+            continue
+        mem_shingles = shingles(normalized)
+        if any(
+            normalized == other or jaccard(mem_shingles, other_shingles) >= similarity
+            for other, other_shingles in seen
+        ):
+            continue
+        seen.append((normalized, mem_shingles))
+        kept.append(mem)
+    return kept
+
+
+def build_context(
+    memories: list[dict[str, Any]],
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    similarity: float = CONTEXT_DEDUP_SIMILARITY,
+) -> tuple[str, ContextStats]:
+    """Dedup, rank, and pack memories into a prompt block of <= ``budget`` tokens."""
+    stats = ContextStats(candidates=len(memories))
+    unique = dedup(rank(memories), similarity)
+    stats.duplicates = len(memories) - len(unique)
+
+    lines = [HEADER]
+    remaining = budget - estimate_tokens(HEADER) - 1
+    for mem in unique:
+        line = f"- [{mem.get('memory_type', 'unknown')}] {_content(mem)}"
+        cost = estimate_tokens(line) + 1  # + newline
+        if cost <= remaining:
+            lines.append(line)
+            remaining -= cost
+            stats.included += 1
+        elif remaining >= MIN_TRUNCATED_TOKENS:
+            lines.append(line[: (remaining - 1) * CHARS_PER_TOKEN - 1] + "…")
+            remaining = 0
+            stats.included += 1
+            stats.truncated += 1
+        else:
+            stats.dropped += 1
+
+    text = "\n".join(lines) if stats.included else EMPTY
+    stats.tokens = estimate_tokens(text)
+    totals.add(stats)
+    return text, stats
@@ -2,17 +2,29 @@
 
 Handles conversation metadata, message storage, and memory retrieval
 against the in-cluster EverMemOS deployment.
+
+All calls go through a shared :class:`EverMemOSClient`, which keeps one
+keep-alive connection pool for the sync API and one for the async API.
+The ``a``-prefixed functions (``astore_message``, ``asearch_memories``, ...)
+are the ones to use from ADK callbacks -- they never block the event loop.
 """
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import logging
 import os
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from typing import Any
 
-import requests
+import httpx
+
+from . import context, telemetry
+from .cache import ProfileCache, QueryCache
 
 logger = logging.getLogger(__name__)
 
@@ -22,22 +34,266 @@ EVERMEMOS_URL = os.environ.get(
 )
 EVERMEMOS_TIMEOUT = int(os.environ.get("EVERMEMOS_TIMEOUT", "30"))
 EVERMEMOS_SEARCH_TIMEOUT = int(os.environ.get("EVERMEMOS_SEARCH_TIMEOUT", "60"))
+EVERMEMOS_CONNECT_TIMEOUT = float(os.environ.get("EVERMEMOS_CONNECT_TIMEOUT", "5"))
+# Shared deadline for the profile + search legs of retrieve_context.
+EVERMEMOS_RETRIEVE_DEADLINE = float(
+    os.environ.get("EVERMEMOS_RETRIEVE_DEADLINE", "5")
+)
+
+# Profile cache: entries are fresh for TTL seconds, then served stale (with a
+# background refresh) until MAX_STALE seconds old.
+PROFILE_CACHE_SIZE = int(os.environ.get("MEMORY_PROFILE_CACHE_SIZE", "1024"))
+PROFILE_CACHE_TTL = float(os.environ.get("MEMORY_PROFILE_CACHE_TTL", "300"))
+PROFILE_CACHE_MAX_STALE = float(
+    os.environ.get("MEMORY_PROFILE_CACHE_MAX_STALE", "3600")
+)
+PROFILE_CACHE_MIN_REFRESH = float(
+    os.environ.get("MEMORY_PROFILE_CACHE_MIN_REFRESH", "60")
+)
+
+# Search-result cache: per-user, reused for the same normalized query.
+QUERY_CACHE_USERS = int(os.environ.get("MEMORY_QUERY_CACHE_USERS", "1024"))
+QUERY_CACHE_PER_USER = int(os.environ.get("MEMORY_QUERY_CACHE_PER_USER", "32"))
+QUERY_CACHE_TTL = float(os.environ.get("MEMORY_QUERY_CACHE_TTL", "120"))
+# Near-duplicate matching is opt-in: 0 (the default) reuses only exact
+# normalized queries.
+QUERY_CACHE_SIMILARITY = float(
+    os.environ.get("MEMORY_QUERY_CACHE_SIMILARITY", "0")
+)
+# Searches younger than this (s) survive invalidation by new messages; 0 (the
+# default) drops every cached search of the user.
+QUERY_CACHE_MIN_REFRESH = float(
+    os.environ.get("MEMORY_QUERY_CACHE_MIN_REFRESH", "0")
+)
+
+# Connection pool sizing (shared by every session in the pod).
+EVERMEMOS_MAX_CONNECTIONS = int(os.environ.get("EVERMEMOS_MAX_CONNECTIONS", "100"))
+EVERMEMOS_MAX_KEEPALIVE = int(os.environ.get("EVERMEMOS_MAX_KEEPALIVE", "20"))
+EVERMEMOS_KEEPALIVE_EXPIRY = float(os.environ.get("EVERMEMOS_KEEPALIVE_EXPIRY", "30"))
 
 _HEADERS = {"Content-Type": "application/json"}
 
+# Endpoint name -> (method, path).  Timeouts are keyed by the same names.
+_ENDPOINTS = {
+    "conversation_meta": ("POST", "/api/v1/memories/conversation-meta"),
+    "store": ("POST", "/api/v1/memories"),
+    "search": ("GET", "/api/v1/memories/search"),
+    "fetch": ("GET", "/api/v1/memories"),
+}
 
-# -- Conversation metadata ---------------------------------------------------
 
-def set_conversation_meta(
-    group_id: str,
-    user_id: str,
-    assistant_id: str,
-) -> dict[str, Any]:
-    """Configure the assistant scene for a conversation group.
+# -- Client ------------------------------------------------------------------
 
-    Safe to call multiple times -- EverMemOS handles idempotency.
+class EverMemOSClient:
+    """Connection-pooled EverMemOS client with sync and async entry points.
+
+    The underlying ``httpx`` clients are created lazily on first use, so
+    constructing an instance never touches the network.  ``timeouts`` maps
+    endpoint names (``conversation_meta``, ``store``, ``search``, ``fetch``)
+    to read timeouts in seconds and overrides the env-derived defaults.
     """
-    payload = {
+
+    def __init__(
+        self,
+        base_url: str = EVERMEMOS_URL,
+        *,
+        timeouts: dict[str, float] | None = None,
+        connect_timeout: float = EVERMEMOS_CONNECT_TIMEOUT,
+        max_connections: int = EVERMEMOS_MAX_CONNECTIONS,
+        max_keepalive: int = EVERMEMOS_MAX_KEEPALIVE,
+        keepalive_expiry: float = EVERMEMOS_KEEPALIVE_EXPIRY,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        read_timeouts: dict[str, float] = {
+            "conversation_meta": EVERMEMOS_TIMEOUT,
+            "store": EVERMEMOS_TIMEOUT,
+            "search": EVERMEMOS_SEARCH_TIMEOUT,
+            "fetch": EVERMEMOS_TIMEOUT,
+        }
+        read_timeouts.update(timeouts or {})
+        self._timeouts = {
+            name: httpx.Timeout(seconds, connect=connect_timeout)
+            for name, seconds in read_timeouts.items()
+        }
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._sync_client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+
+    # -- transport -----------------------------------------------------------
+
+    def _sync(self) -> httpx.Client:
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(
+                base_url=self.base_url, headers=_HEADERS, limits=self._limits
+            )
+        return self._sync_client
+
+    def _async(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url, headers=_HEADERS, limits=self._limits
+            )
+        return self._async_client
+
+    def _request(
+        self, endpoint: str, payload: dict[str, Any], timeout: float | None = None
+    ) -> dict[str, Any]:
+        """Sync request; ``timeout`` (seconds) lowers each httpx timeout to it."""
+        method, path = _ENDPOINTS[endpoint]
+        limits = self._timeouts[endpoint]
+        if timeout is not None:
+            limits = httpx.Timeout(
+                timeout,
+                connect=min(timeout, limits.connect),
+                read=min(timeout, limits.read),
+            )
+        with telemetry.span(f"memory.{endpoint}", **{"http.route": path}):
+            resp = self._sync().request(method, path, json=payload, timeout=limits)
+            resp.raise_for_status()
+        telemetry.record_payload(f"memory.{endpoint}", len(resp.content))
+        return resp.json()
+
+    async def _arequest(
+        self, endpoint: str, payload: dict[str, Any]
+    ) -> dict[str, Any]:
+        method, path = _ENDPOINTS[endpoint]
+        with telemetry.span(f"memory.{endpoint}", **{"http.route": path}):
+            resp = await self._async().request(
+                method, path, json=payload, timeout=self._timeouts[endpoint]
+            )
+            resp.raise_for_status()
+        telemetry.record_payload(f"memory.{endpoint}", len(resp.content))
+        return resp.json()
+
+    def close(self) -> None:
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+    # -- API -----------------------------------------------------------------
+
+    def set_conversation_meta(
+        self, group_id: str, user_id: str, assistant_id: str
+    ) -> dict[str, Any]:
+        return self._request(
+            "conversation_meta",
+            _conversation_meta_payload(group_id, user_id, assistant_id),
+        )
+
+    async def aset_conversation_meta(
+        self, group_id: str, user_id: str, assistant_id: str
+    ) -> dict[str, Any]:
+        return await self._arequest(
+            "conversation_meta",
+            _conversation_meta_payload(group_id, user_id, assistant_id),
+        )
+
+    def store_message(
+        self,
+        group_id: str,
+        sender: str,
+        content: str,
+        role: str = "user",
+        sender_name: str | None = None,
+        message_id: str | None = None,
+        create_time: str | None = None,
+    ) -> dict[str, Any]:
+        return self._request(
+            "store",
+            _message_payload(
+                group_id, sender, content, role, sender_name, message_id, create_time
+            ),
+        )
+
+    async def astore_message(
+        self,
+        group_id: str,
+        sender: str,
+        content: str,
+        role: str = "user",
+        sender_name: str | None = None,
+        message_id: str | None = None,
+        create_time: str | None = None,
+    ) -> dict[str, Any]:
+        return await self._arequest(
+            "store",
+            _message_payload(
+                group_id, sender, content, role, sender_name, message_id, create_time
+            ),
+        )
+
+    def search_memories(
+        self, query: str, timeout: float | None = None, **kwargs: Any
+    ) -> list[dict[str, Any]]:
+        return _memories(
+            self._request("search", _search_payload(query, **kwargs), timeout)
+        )
+
+    async def asearch_memories(
+        self, query: str, **kwargs: Any
+    ) -> list[dict[str, Any]]:
+        return _memories(
+            await self._arequest("search", _search_payload(query, **kwargs))
+        )
+
+    def fetch_profile(
+        self,
+        user_id: str,
+        page_size: int = 10,
+        group_id: str | None = None,
+        timeout: float | None = None,
+    ) -> list[dict[str, Any]]:
+        return _memories(
+            self._request(
+                "fetch", _profile_payload(user_id, page_size, group_id), timeout
+            )
+        )
+
+    async def afetch_profile(
+        self, user_id: str, page_size: int = 10, group_id: str | None = None
+    ) -> list[dict[str, Any]]:
+        return _memories(
+            await self._arequest(
+                "fetch", _profile_payload(user_id, page_size, group_id)
+            )
+        )
+
+
+_client: EverMemOSClient | None = None
+
+
+def get_client() -> EverMemOSClient:
+    """Return the process-wide client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = EverMemOSClient()
+    return _client
+
+
+async def aclose() -> None:
+    """Close the shared client's connection pools (call on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# -- Payloads ----------------------------------------------------------------
+
+def _conversation_meta_payload(
+    group_id: str, user_id: str, assistant_id: str
+) -> dict[str, Any]:
+    return {
         "scene": "assistant",
         "scene_desc": {"description": "Personal assistant conversation"},
         "name": "Personal Assistant",
@@ -54,60 +310,36 @@ def set_conversation_meta(
             },
         },
     }
-    resp = requests.post(
-        f"{EVERMEMOS_URL}/api/v1/memories/conversation-meta",
-        json=payload,
-        headers=_HEADERS,
-        timeout=EVERMEMOS_TIMEOUT,
-    )
-    resp.raise_for_status()
-    return resp.json()
-
 
-# -- Message storage ---------------------------------------------------------
 
-def store_message(
+def _message_payload(
     group_id: str,
     sender: str,
     content: str,
-    role: str = "user",
-    sender_name: str | None = None,
+    role: str,
+    sender_name: str | None,
+    message_id: str | None = None,
+    create_time: str | None = None,
 ) -> dict[str, Any]:
-    """Store a single message for memory extraction.
-
-    EverMemOS processes messages asynchronously -- it auto-detects
-    conversation boundaries and extracts memories in the background.
-    """
-    payload = {
+    return {
         "group_id": group_id,
-        "message_id": str(uuid.uuid4()),
-        "create_time": datetime.now(timezone.utc).isoformat(),
+        "message_id": message_id or str(uuid.uuid4()),
+        "create_time": create_time or datetime.now(timezone.utc).isoformat(),
         "sender": sender,
         "sender_name": sender_name or sender,
         "role": role,
         "content": content,
     }
-    resp = requests.post(
-        f"{EVERMEMOS_URL}/api/v1/memories",
-        json=payload,
-        headers=_HEADERS,
-        timeout=EVERMEMOS_TIMEOUT,
-    )
-    resp.raise_for_status()
-    return resp.json()
 
 
-# -- Retrieval ---------------------------------------------------------------
-
-def search_memories(
+def _search_payload(
     query: str,
     user_id: str | None = None,
     group_id: str | None = None,
     retrieve_method: str = "hybrid",
     top_k: int = 5,
     memory_types: list[str] | None = None,
-) -> list[dict[str, Any]]:
-    """Search for relevant memories.  Returns a flat list of memory dicts."""
+) -> dict[str, Any]:
     payload: dict[str, Any] = {
         "query": query,
         "retrieve_method": retrieve_method,
@@ -119,73 +351,380 @@ def search_memories(
         payload["user_id"] = user_id
     if group_id:
         payload["group_id"] = group_id
-
-    resp = requests.get(
-        f"{EVERMEMOS_URL}/api/v1/memories/search",
-        json=payload,
-        headers=_HEADERS,
-        timeout=EVERMEMOS_SEARCH_TIMEOUT,
-    )
-    resp.raise_for_status()
-    data = resp.json().get("data", {})
-    return data.get("memories", [])
+    return payload
 
 
-def fetch_profile(user_id: str, page_size: int = 10) -> list[dict[str, Any]]:
-    """Fetch stable profile memories for a user."""
-    payload = {
+def _profile_payload(
+    user_id: str, page_size: int, group_id: str | None = None
+) -> dict[str, Any]:
+    payload: dict[str, Any] = {
         "user_id": user_id,
         "memory_type": "profile",
         "page": 1,
         "page_size": page_size,
     }
-    resp = requests.get(
-        f"{EVERMEMOS_URL}/api/v1/memories",
-        json=payload,
-        headers=_HEADERS,
-        timeout=EVERMEMOS_TIMEOUT,
+    if group_id:
+        payload["group_id"] = group_id
+    return payload
+
+
+def _memories(body: dict[str, Any]) -> list[dict[str, Any]]:
+    return body.get("data", {}).get("memories", [])
+
+
+# -- Conversation metadata ---------------------------------------------------
+
+def set_conversation_meta(
+    group_id: str,
+    user_id: str,
+    assistant_id: str,
+) -> dict[str, Any]:
+    """Configure the assistant scene for a conversation group.
+
+    Safe to call multiple times -- EverMemOS handles idempotency.
+    """
+    return get_client().set_conversation_meta(group_id, user_id, assistant_id)
+
+
+async def aset_conversation_meta(
+    group_id: str,
+    user_id: str,
+    assistant_id: str,
+) -> dict[str, Any]:
+    """Async variant of :func:`set_conversation_meta`."""
+    return await get_client().aset_conversation_meta(group_id, user_id, assistant_id)
+
+
+# -- Message storage ---------------------------------------------------------
+
+def store_message(
+    group_id: str,
+    sender: str,
+    content: str,
+    role: str = "user",
+    sender_name: str | None = None,
+    message_id: str | None = None,
+    create_time: str | None = None,
+) -> dict[str, Any]:
+    """Store a single message for memory extraction.
+
+    EverMemOS processes messages asynchronously -- it auto-detects
+    conversation boundaries and extracts memories in the background.
+    ``message_id`` and ``create_time`` default to a fresh UUID and now;
+    pass them explicitly to make retries of the same message idempotent.
+    """
+    return get_client().store_message(
+        group_id, sender, content, role, sender_name, message_id, create_time
     )
-    resp.raise_for_status()
-    data = resp.json().get("data", {})
-    return data.get("memories", [])
 
 
-def retrieve_context(query: str, user_id: str) -> str:
-    """Retrieve relevant memories and format as a prompt block.
+async def astore_message(
+    group_id: str,
+    sender: str,
+    content: str,
+    role: str = "user",
+    sender_name: str | None = None,
+    message_id: str | None = None,
+    create_time: str | None = None,
+) -> dict[str, Any]:
+    """Async variant of :func:`store_message`."""
+    return await get_client().astore_message(
+        group_id, sender, content, role, sender_name, message_id, create_time
+    )
 
-    Two-pronged approach:
-      1. Profile (fetch) -- stable user facts
-      2. Episodic + foresight (search) -- relevant past interactions
+
+# -- Retrieval ---------------------------------------------------------------
+
+def search_memories(
+    query: str,
+    user_id: str | None = None,
+    group_id: str | None = None,
+    retrieve_method: str = "hybrid",
+    top_k: int = 5,
+    memory_types: list[str] | None = None,
+    timeout: float | None = None,
+) -> list[dict[str, Any]]:
+    """Search for relevant memories.  Returns a flat list of memory dicts.
+
+    ``timeout`` (seconds) caps the request below the configured timeouts.
     """
+    return get_client().search_memories(
+        query,
+        timeout=timeout,
+        user_id=user_id,
+        group_id=group_id,
+        retrieve_method=retrieve_method,
+        top_k=top_k,
+        memory_types=memory_types,
+    )
+
+
+async def asearch_memories(
+    query: str,
+    user_id: str | None = None,
+    group_id: str | None = None,
+    retrieve_method: str = "hybrid",
+    top_k: int = 5,
+    memory_types: list[str] | None = None,
+) -> list[dict[str, Any]]:
+    """Async variant of :func:`search_memories`."""
+    return await get_client().asearch_memories(
+        query,
+        user_id=user_id,
+        group_id=group_id,
+        retrieve_method=retrieve_method,
+        top_k=top_k,
+        memory_types=memory_types,
+    )
+
+
+def fetch_profile(
+    user_id: str,
+    page_size: int = 10,
+    group_id: str | None = None,
+    timeout: float | None = None,
+) -> list[dict[str, Any]]:
+    """Fetch stable profile memories for a user (``timeout`` as for search)."""
+    return get_client().fetch_profile(user_id, page_size, group_id, timeout)
+
+
+async def afetch_profile(
+    user_id: str, page_size: int = 10, group_id: str | None = None
+) -> list[dict[str, Any]]:
+    """Async variant of :func:`fetch_profile`.  Always goes to the network."""
+    return await get_client().afetch_profile(user_id, page_size, group_id)
+
+
+# -- Profile cache -----------------------------------------------------------
+
+_profiles = ProfileCache(
+    fetch=lambda user_id, group_id: afetch_profile(user_id, group_id=group_id),
+    maxsize=PROFILE_CACHE_SIZE,
+    ttl=PROFILE_CACHE_TTL,
+    max_stale=PROFILE_CACHE_MAX_STALE,
+    min_refresh=PROFILE_CACHE_MIN_REFRESH,
+)
+
+
+def profile_cache() -> ProfileCache:
+    """Return the process-wide profile cache (for stats and tests)."""
+    return _profiles
+
+
+async def aget_profile(
+    user_id: str, group_id: str | None = None
+) -> list[dict[str, Any]]:
+    """Profile memories via the TTL cache (stale-while-revalidate)."""
+    return await _profiles.get(user_id, group_id)
+
+
+def invalidate_profile(
+    user_id: str | None = None, group_id: str | None = None
+) -> None:
+    """Mark cached profiles for a user or group stale after new messages."""
+    _profiles.invalidate(user_id=user_id, group_id=group_id)
+
+
+# -- Search cache ------------------------------------------------------------
+
+_queries = QueryCache(
+    max_users=QUERY_CACHE_USERS,
+    per_user=QUERY_CACHE_PER_USER,
+    ttl=QUERY_CACHE_TTL,
+    similarity=QUERY_CACHE_SIMILARITY,
+    min_refresh=QUERY_CACHE_MIN_REFRESH,
+)
+
+
+def query_cache() -> QueryCache:
+    """Return the process-wide search cache (for stats and tests)."""
+    return _queries
+
+
+async def acached_search(
+    query: str,
+    user_id: str,
+    group_id: str | None = None,
+    retrieve_method: str = "hybrid",
+    top_k: int = 5,
+    memory_types: list[str] | None = None,
+) -> list[dict[str, Any]]:
+    """:func:`asearch_memories` through the per-user query cache."""
+    scope = (group_id, retrieve_method, top_k, tuple(memory_types or ()))
+    cached = _queries.get(user_id, scope, query)
+    if cached is not None:
+        return cached
+    memories = await asearch_memories(
+        query,
+        user_id=user_id,
+        group_id=group_id,
+        retrieve_method=retrieve_method,
+        top_k=top_k,
+        memory_types=memory_types,
+    )
+    _queries.put(user_id, scope, query, memories)
+    return memories
+
+
+def invalidate_caches(
+    user_id: str | None = None, group_id: str | None = None
+) -> None:
+    """Invalidate cached profiles and searches after new messages are stored.
+
+    Retrieval (:func:`aretrieve_context`) caches per user with no group, so
+    the writer invalidates by ``user_id``; ``group_id`` only matches
+    entries cached with an explicit group.
+    """
+    _profiles.invalidate(user_id=user_id, group_id=group_id)
+    _queries.invalidate(user_id=user_id, group_id=group_id)
+
+
+def format_context(memories: list[dict[str, Any]]) -> str:
+    """Format retrieved memories as a prompt block.
+
+    Deduplicated, ranked, and packed into ``MEMORY_CONTEXT_TOKEN_BUDGET``
+    tokens; see :mod:`.context`.
+    """
+    text, stats = context.build_context(memories)
+    if stats.dropped or stats.truncated:
+        logger.debug(
+            "Memory context over budget: %d dropped, %d truncated",
+            stats.dropped, stats.truncated,
+        )
+    return text
+
+
+# Episodic + foresight search used for prompt context.
+CONTEXT_SEARCH: dict[str, Any] = {
+    "retrieve_method": "hybrid",
+    "top_k": 5,
+    "memory_types": ["episodic_memory", "foresight"],
+}
+
+# Sync retrieve_context runs both legs on these threads (the sync httpx
+# client is thread-safe, so they share one connection pool).
+_retrieval_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="evermemos")
+
+
+def _leg(ends_at: float, fn, *args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+    """Run a sync retrieval leg with what is left of the shared deadline.
+
+    A running thread cannot be cancelled, so the leg's HTTP timeouts are
+    lowered to the remaining time instead; a leg that waited in the pool
+    past the deadline does not start at all.
+    """
+    remaining = ends_at - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("deadline passed before the request started")
+    return fn(*args, timeout=remaining, **kwargs)
+
+
+def _collect(
+    legs: dict[str, asyncio.Future | Future],
+    deadline: float,
+    fallback: dict[str, list[dict[str, Any]]] | None = None,
+) -> list[dict[str, Any]]:
+    """Merge whichever retrieval legs finished; give up on and log the rest.
+
+    Async legs that missed the deadline are cancelled.  Sync legs already
+    running in a thread cannot be: they are abandoned, and stop on their
+    own timeouts (see :func:`_leg`).  A leg that missed the deadline or
+    failed is replaced by its entry in ``fallback`` (e.g. prefetched
+    results), if any.  Profile results come first so stable facts lead the
+    prompt block.
+    """
+    fallback = fallback or {}
     all_memories: list[dict[str, Any]] = []
+    for name, fut in legs.items():
+        if not fut.done():
+            fut.cancel()
+            if name in fallback:
+                logger.debug("Memory %s not ready; using fallback", name)
+                all_memories.extend(fallback[name])
+            else:
+                logger.warning("Memory %s missed the %.1fs deadline", name, deadline)
+            continue
+        exc = fut.exception()
+        if exc is not None:
+            logger.warning("Memory %s failed: %s", name, exc)
+            all_memories.extend(fallback.get(name, []))
+            continue
+        all_memories.extend(fut.result())
+    return all_memories
 
-    try:
-        all_memories.extend(fetch_profile(user_id))
-    except Exception as exc:
-        logger.warning("Profile fetch failed: %s", exc)
 
-    try:
-        all_memories.extend(
-            search_memories(
+def retrieve_context(
+    query: str, user_id: str, deadline: float | None = None
+) -> str:
+    """Retrieve relevant memories and format as a prompt block.
+
+    Two-pronged approach, run concurrently under one shared ``deadline``
+    (seconds, default ``EVERMEMOS_RETRIEVE_DEADLINE``):
+      1. Profile (fetch) -- stable user facts
+      2. Episodic + foresight (search) -- relevant past interactions
+
+    A leg that fails or misses the deadline is dropped; the prompt block is
+    built from whatever arrived in time.  A leg still running at the deadline
+    is abandoned rather than cancelled, but each of its httpx timeouts
+    (connect, read, ...) is capped at the time left, so its thread is freed
+    soon after and late legs do not pile up in the pool.
+    """
+    deadline = EVERMEMOS_RETRIEVE_DEADLINE if deadline is None else deadline
+    ends_at = time.monotonic() + deadline
+    with telemetry.span("memory.retrieve_context"):
+        # Each leg runs in a copy of this context so its spans keep their parent.
+        legs = {
+            "profile fetch": _retrieval_pool.submit(
+                contextvars.copy_context().run, _leg, ends_at, fetch_profile, user_id
+            ),
+            "search": _retrieval_pool.submit(
+                contextvars.copy_context().run,
+                _leg,
+                ends_at,
+                search_memories,
                 query=query,
                 user_id=user_id,
-                retrieve_method="hybrid",
-                top_k=5,
-                memory_types=["episodic_memory", "foresight"],
+                **CONTEXT_SEARCH,
+            ),
+        }
+        wait(legs.values(), timeout=deadline)
+        return format_context(_collect(legs, deadline))
+
+
+async def aretrieve_context(
+    query: str,
+    user_id: str,
+    deadline: float | None = None,
+    fallback: dict[str, list[dict[str, Any]]] | None = None,
+    grace: float | None = None,
+) -> str:
+    """Async variant of :func:`retrieve_context`.
+
+    ``fallback`` maps a leg name (``"profile fetch"``, ``"search"``) to
+    memories to use if that leg misses the deadline or fails.  With
+    ``grace``, legs that have a fallback are only waited for that long;
+    the others still get the full ``deadline``.
+    """
+    deadline = EVERMEMOS_RETRIEVE_DEADLINE if deadline is None else deadline
+    fallback = fallback or {}
+    with telemetry.span("memory.retrieve_context"):
+        legs = {
+            "profile fetch": asyncio.ensure_future(aget_profile(user_id)),
+            "search": asyncio.ensure_future(
+                acached_search(query=query, user_id=user_id, **CONTEXT_SEARCH)
+            ),
+        }
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if grace is not None and fallback:
+            await asyncio.wait(
+                [fut for name, fut in legs.items() if name in fallback],
+                timeout=min(grace, deadline),
             )
-        )
-    except Exception as exc:
-        logger.warning("Memory search failed: %s", exc)
-
-    if not all_memories:
-        return "You don't have any prior memories about this user yet."
-
-    lines = [
-        "Here is what you remember about this user from previous conversations:"
-    ]
-    for mem in all_memories:
-        mem_type = mem.get("memory_type", "unknown")
-        content = mem.get("memory_content", mem.get("content", ""))
-        if content:
-            lines.append(f"- [{mem_type}] {content}")
-    return "\n".join(lines)
+            rest = [fut for name, fut in legs.items() if name not in fallback]
+            if rest:
+                remaining = deadline - (loop.time() - started)
+                await asyncio.wait(rest, timeout=max(remaining, 0))
+        else:
+            await asyncio.wait(legs.values(), timeout=deadline)
+        return format_context(_collect(legs, deadline, fallback))
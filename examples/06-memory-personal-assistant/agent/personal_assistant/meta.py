@@ -0,0 +1,143 @@
+"""Lazy, idempotent conversation-meta setup.
+
+EverMemOS needs the "assistant" scene configured for a group before its
+messages are useful.  Instead of posting it at import time (which blocked
+pod startup on a network round trip), :func:`ensure` schedules the call in
+the background the first time a group_id is used and remembers groups that
+succeeded, so later turns skip it entirely.
+
+Known group_ids are kept in a bounded in-process set and, if
+``MEMORY_META_CACHE_FILE`` points at a writable path (e.g. a volume),
+appended there so restarts skip them too.  The file is bounded like the
+set: once it holds more than twice as many lines as there are known
+groups (duplicates, or groups the set has since evicted), it is rewritten
+with just the known groups -- on load, and as lines are appended.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from . import memory
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+META_CACHE_SIZE = int(os.environ.get("MEMORY_META_CACHE_SIZE", "10000"))
+META_CACHE_FILE = os.environ.get("MEMORY_META_CACHE_FILE", "")
+
+
+class ConversationMetaRegistry:
+    """Tracks which group_ids have conversation meta set up."""
+
+    def __init__(
+        self, maxsize: int = META_CACHE_SIZE, cache_file: str = META_CACHE_FILE
+    ) -> None:
+        self._known: LRUCache[str, bool] = LRUCache(maxsize)
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._cache_file = Path(cache_file) if cache_file else None
+        self._file_lines = 0  # lines currently in the cache file
+        self._loaded = False
+
+    def is_known(self, group_id: str) -> bool:
+        self._load()
+        return group_id in self._known
+
+    def ensure(self, group_id: str, user_id: str, assistant_id: str) -> None:
+        """Schedule meta setup for ``group_id`` unless done or in flight.
+
+        Never blocks; must be called from within the running event loop.
+        A failed setup is retried on the next call.
+        """
+        if self.is_known(group_id) or group_id in self._inflight:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._setup(group_id, user_id, assistant_id)
+        )
+        self._inflight[group_id] = task
+
+    async def wait(self, group_id: str, timeout: float) -> bool:
+        """Wait (up to ``timeout``) for an in-flight setup of ``group_id``.
+
+        Returns True if the group is known afterwards.
+        """
+        task = self._inflight.get(group_id)
+        if task is not None:
+            await asyncio.wait({task}, timeout=timeout)
+        return self.is_known(group_id)
+
+    async def _setup(self, group_id: str, user_id: str, assistant_id: str) -> None:
+        try:
+            await memory.aset_conversation_meta(group_id, user_id, assistant_id)
+        except Exception as exc:
+            logger.warning(
+                "Could not set conversation meta for group %s: %s", group_id, exc
+            )
+            return
+        finally:
+            self._inflight.pop(group_id, None)
+        self._known.set(group_id, True)
+        self._persist(group_id)
+        logger.info("Conversation meta set: group_id=%s", group_id)
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self._cache_file is None or not self._cache_file.exists():
+            return
+        try:
+            for line in self._cache_file.read_text().splitlines():
+                if line:
+                    self._known.set(line, True)
+                    self._file_lines += 1
+        except OSError as exc:
+            logger.warning("Could not read %s: %s", self._cache_file, exc)
+            return
+        self._maybe_compact()
+
+    def _persist(self, group_id: str) -> None:
+        if self._cache_file is None:
+            return
+        try:
+            with self._cache_file.open("a") as f:
+                f.write(group_id + "\n")
+        except OSError as exc:
+            logger.warning("Could not write %s: %s", self._cache_file, exc)
+            return
+        self._file_lines += 1
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        """Rewrite the cache file with only the known groups, if it is bloated."""
+        if self._file_lines <= 2 * max(len(self._known), 1):
+            return
+        groups = [group_id for group_id, _ in self._known.items()]
+        try:
+            fd, tmp = tempfile.mkstemp(
+                dir=self._cache_file.parent, prefix=f".{self._cache_file.name}."
+            )
+            with os.fdopen(fd, "w") as f:
+                f.writelines(group_id + "\n" for group_id in groups)
+            os.replace(tmp, self._cache_file)
+        except OSError as exc:
+            logger.warning("Could not compact %s: %s", self._cache_file, exc)
+            return
+        self._file_lines = len(groups)
+
+
+_registry = ConversationMetaRegistry()
+
+
+def get_registry() -> ConversationMetaRegistry:
+    """Return the process-wide registry."""
+    return _registry
+
+
+def ensure(group_id: str, user_id: str, assistant_id: str) -> None:
+    """Schedule conversation-meta setup on the process-wide registry."""
+    _registry.ensure(group_id, user_id, assistant_id)
@@ -0,0 +1,142 @@
+"""Speculative memory prefetch (opt-in via ``MEMORY_PREFETCH=true``).
+
+Without prefetch, retrieval starts only when the user message reaches
+``before_model_callback``.  With it:
+
+- When a session opens, the profile is warmed and a generic
+  "recent context" search runs in the background.
+- After each model response, a search for the likely follow-up (the last
+  exchange) runs in the background while the user reads and types.
+
+The next turn still issues its real search, but only waits
+``MEMORY_PREFETCH_GRACE`` seconds for it; if it has not arrived by then,
+the prefetched results (if younger than ``MEMORY_PREFETCH_TTL``) are used
+instead.  The grace applies to the search alone: the profile fetch keeps
+the full ``EVERMEMOS_RETRIEVE_DEADLINE``, as it has no fallback (and is
+usually a cache hit, warmed when the session opened).  Retrieval
+therefore leaves the critical path for most turns without giving up
+relevance when EverMemOS is fast.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from . import memory
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ENABLED = os.environ.get("MEMORY_PREFETCH", "false").lower() == "true"
+PREFETCH_TTL = float(os.environ.get("MEMORY_PREFETCH_TTL", "120"))
+PREFETCH_GRACE = float(os.environ.get("MEMORY_PREFETCH_GRACE", "0.3"))
+PREFETCH_QUERY = os.environ.get(
+    "MEMORY_PREFETCH_QUERY",
+    "recent conversations, ongoing plans, and stated preferences",
+)
+PREFETCH_MAX_SESSIONS = int(os.environ.get("MEMORY_PREFETCH_MAX_SESSIONS", "1024"))
+# Characters of the last exchange used as the speculative follow-up query.
+_FOLLOW_UP_CHARS = 500
+
+
+@dataclass
+class _Slot:
+    memories: list[dict[str, Any]]
+    fetched_at: float
+
+
+@dataclass
+class PrefetchStats:
+    sessions_warmed: int = 0
+    speculative_searches: int = 0
+    used: int = 0  # turns that had a fresh prefetch available
+    expired: int = 0  # prefetch too old to use
+    failed: int = 0
+
+
+class Prefetcher:
+    """Per-user speculative search results, bounded by ``max_sessions``."""
+
+    def __init__(
+        self,
+        ttl: float = PREFETCH_TTL,
+        grace: float = PREFETCH_GRACE,
+        max_sessions: int = PREFETCH_MAX_SESSIONS,
+    ) -> None:
+        self.ttl = ttl
+        self.grace = grace
+        self.stats = PrefetchStats()
+        self._slots: LRUCache[tuple[str, str | None], _Slot] = LRUCache(max_sessions)
+        self._seen_sessions: LRUCache[str, bool] = LRUCache(max_sessions)
+        self._tasks: set[asyncio.Task] = set()
+
+    def on_session_start(
+        self, session_id: str, user_id: str, group_id: str | None = None
+    ) -> None:
+        """Warm profile + recent context the first time a session is seen."""
+        if session_id in self._seen_sessions:
+            return
+        self._seen_sessions.set(session_id, True)
+        self.stats.sessions_warmed += 1
+        self._spawn(memory.aget_profile(user_id, group_id))
+        self._spawn(self._search(PREFETCH_QUERY, user_id, group_id))
+
+    def speculate(
+        self,
+        user_id: str,
+        last_user_message: str,
+        last_response: str,
+        group_id: str | None = None,
+    ) -> None:
+        """Search for the likely follow-up to the exchange that just happened."""
+        query = f"{last_user_message}\n{last_response}"[:_FOLLOW_UP_CHARS]
+        self.stats.speculative_searches += 1
+        self._spawn(self._search(query, user_id, group_id))
+
+    async def aretrieve_context(
+        self, query: str, user_id: str, group_id: str | None = None
+    ) -> str:
+        """:func:`memory.aretrieve_context`, falling back to prefetched results."""
+        slot = self._slots.pop((user_id, group_id))
+        if slot is not None and time.monotonic() - slot.fetched_at > self.ttl:
+            self.stats.expired += 1
+            slot = None
+        if slot is None:
+            return await memory.aretrieve_context(query, user_id)
+        self.stats.used += 1
+        return await memory.aretrieve_context(
+            query, user_id, fallback={"search": slot.memories}, grace=self.grace
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        return {**asdict(self.stats), "pending": len(self._tasks)}
+
+    async def _search(self, query: str, user_id: str, group_id: str | None) -> None:
+        memories = await memory.acached_search(
+            query, user_id=user_id, group_id=group_id, **memory.CONTEXT_SEARCH
+        )
+        self._slots.set((user_id, group_id), _Slot(memories, time.monotonic()))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)  # keep a reference until done
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats.failed += 1
+            logger.debug("Memory prefetch failed: %s", task.exception())
+
+
+_prefetcher = Prefetcher()
+
+
+def get_prefetcher() -> Prefetcher:
+    """Return the process-wide prefetcher."""
+    return _prefetcher
@@ -0,0 +1,110 @@
+"""Prompt-cache breakpoints and hit/miss accounting for the LLM calls.
+
+Anthropic caches a prompt by prefix: a request hits only if everything up
+to a cache breakpoint is byte-identical to an earlier request.  The agent
+therefore keeps the volatile memory block out of the system instruction
+(see ``agent.before_model_callback``): the system prompt is the same on
+every turn, and memory rides in front of the latest user message.
+
+Two breakpoints are requested through LiteLLM's
+``cache_control_injection_points``, which the gateway passes through as
+``cache_control`` blocks:
+
+  - the system message -- instruction + guidelines (and tool definitions,
+    which Anthropic places before it);
+  - the message just before the latest user turn -- the conversation so
+    far, which the next turn extends rather than changes.
+
+Providers that cache automatically or not at all drop the points.  A prefix
+shorter than the model's minimum cacheable length (1024 tokens for most
+Claude models) is not cached, so early turns of a short conversation miss.
+
+:data:`totals` accumulates the usage reported back by the gateway: cached
+(read) and cache-write tokens, and per-response hits and misses.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PROMPT_CACHE_ENABLED = os.environ.get("LLM_PROMPT_CACHE", "true").lower() == "true"
+PROMPT_CACHE_TTL = os.environ.get("LLM_PROMPT_CACHE_TTL", "5m")
+
+_CONTROL: dict[str, Any] = {"type": "ephemeral"}
+if PROMPT_CACHE_TTL != "5m":
+    _CONTROL["ttl"] = PROMPT_CACHE_TTL
+
+# Indices count LiteLLM's final message list, where the latest user turn
+# (memory + question) is one message: -2 is the last message before it.
+INJECTION_POINTS: list[dict[str, Any]] = [
+    {"location": "message", "role": "system", "control": _CONTROL},
+    {"location": "message", "index": -2, "control": _CONTROL},
+]
+
+
+def model_kwargs() -> dict[str, Any]:
+    """Extra ``LiteLlm`` arguments enabling the breakpoints (empty if disabled)."""
+    if not PROMPT_CACHE_ENABLED:
+        return {}
+    return {"cache_control_injection_points": INJECTION_POINTS}
+
+
+@dataclass
+class PromptCacheStats:
+    """Cumulative prompt-cache usage as reported in LLM responses."""
+
+    responses: int = 0
+    hits: int = 0  # responses that read any cached tokens
+    misses: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0  # prompt tokens read from the cache
+    cache_write_tokens: int = 0  # prompt tokens written to the cache
+
+    def record(self, usage: Any) -> tuple[int, int]:
+        """Add one response's usage metadata; return ``(cached, written)``."""
+        cached = usage.cached_content_token_count or 0
+        written = getattr(usage, "cache_creation_input_tokens", None) or 0
+        self.responses += 1
+        if cached:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.prompt_tokens += usage.prompt_token_count or 0
+        self.cached_tokens += cached
+        self.cache_write_tokens += written
+        return cached, written
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "hit_ratio": round(self.hits / self.responses, 3) if self.responses else 0.0,
+            "cached_token_ratio": (
+                round(self.cached_tokens / self.prompt_tokens, 3)
+                if self.prompt_tokens
+                else 0.0
+            ),
+        }
+
+
+# Cumulative counts across every response in this process.
+totals = PromptCacheStats()
+
+
+def record(usage: Any) -> None:
+    """Account for one response's ``usage_metadata`` (None is ignored)."""
+    if usage is None:
+        return
+    cached, written = totals.record(usage)
+    logger.debug(
+        "Prompt cache %s: prompt=%s cached=%d written=%d (hit ratio %.2f)",
+        "hit" if cached else "miss",
+        usage.prompt_token_count,
+        cached,
+        written,
+        totals.hits / totals.responses,
+    )
@@ -0,0 +1,125 @@
+"""Opt-in OpenTelemetry spans and histograms for the memory hot path.
+
+Enabled with ``OTEL_TRACING_ENABLED=true``.  Exporters are configured from
+the standard ``OTEL_*`` environment (``OTEL_EXPORTER_OTLP_ENDPOINT``,
+``OTEL_SERVICE_NAME``, ...).  If the process already has a tracer or meter
+provider (e.g. set up by the ADK runtime), it is reused instead of
+replaced.
+
+Instruments:
+  spans                  one per EverMemOS call (``memory.search``, ...) and
+                         per ``memory.retrieve_context``
+  memory.duration        histogram, ms, by ``operation`` and ``error``
+  memory.payload.size    histogram, bytes of response body, by ``operation``
+
+When disabled, :func:`span` returns a shared no-op context manager and
+:func:`record_payload` returns immediately: each call costs one flag check,
+and OpenTelemetry is never imported.  The OTLP exporters are an optional extra
+(``uv sync --extra otel``); without them telemetry logs a warning and
+stays off.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.environ.get("OTEL_TRACING_ENABLED", "false").lower() == "true"
+SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "personal-assistant")
+METRIC_PREFIX = "memory"
+
+_NOOP = contextlib.nullcontext()
+_tracer: Any = None
+_duration: Any = None
+_payload: Any = None
+_enabled = TRACING_ENABLED
+_setup_lock = threading.Lock()
+
+
+def _setup() -> bool:
+    """Create the tracer and instruments on first use; False if unavailable."""
+    with _setup_lock:
+        if _tracer is None and _enabled:
+            _install()
+    return _enabled
+
+
+def _install() -> None:
+    global _tracer, _duration, _payload, _enabled
+    try:
+        from opentelemetry import metrics, trace
+        from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
+            OTLPMetricExporter,
+        )
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError as exc:
+        logger.warning("OTEL_TRACING_ENABLED is set but %s; telemetry disabled", exc)
+        _enabled = False
+        return
+
+    resource = Resource.create({"service.name": SERVICE_NAME})
+    if isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider):
+        provider = TracerProvider(resource=resource)
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        trace.set_tracer_provider(provider)
+    # The API has no public proxy class for meters; the default one is
+    # ``_ProxyMeterProvider`` until someone installs a real provider.
+    if type(metrics.get_meter_provider()).__name__.startswith("_Proxy"):
+        reader = PeriodicExportingMetricReader(OTLPMetricExporter())
+        metrics.set_meter_provider(
+            MeterProvider(resource=resource, metric_readers=[reader])
+        )
+
+    _tracer = trace.get_tracer(__name__)
+    meter = metrics.get_meter(__name__)
+    _duration = meter.create_histogram(
+        f"{METRIC_PREFIX}.duration", unit="ms", description="Call latency"
+    )
+    _payload = meter.create_histogram(
+        f"{METRIC_PREFIX}.payload.size", unit="By", description="Response body size"
+    )
+
+
+@contextlib.contextmanager
+def _span(name: str, attributes: dict[str, Any]) -> Iterator[Any]:
+    started = time.perf_counter()
+    error = False
+    with _tracer.start_as_current_span(name, attributes=attributes) as span:
+        try:
+            yield span
+        except BaseException:
+            error = True
+            raise
+        finally:
+            _duration.record(
+                (time.perf_counter() - started) * 1000,
+                {"operation": name, "error": error},
+            )
+
+
+def span(name: str, **attributes: Any) -> contextlib.AbstractContextManager:
+    """Trace a block as span ``name`` and record its duration."""
+    if not _enabled or (_tracer is None and not _setup()):
+        return _NOOP
+    return _span(name, attributes)
+
+
+def record_payload(name: str, size: int) -> None:
+    """Record a payload size (bytes) for operation ``name``."""
+    if not _enabled or (_payload is None and not _setup()):
+        return
+    _payload.record(size, {"operation": name})
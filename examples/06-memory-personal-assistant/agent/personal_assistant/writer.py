@@ -0,0 +1,327 @@
+"""Write-behind queue for EverMemOS message ingestion.
+
+The model callbacks hand messages to :func:`submit`, which only appends to
+a bounded in-process queue and returns immediately.  A background worker
+drains the queue in batches and stores each message with retries, so
+memory ingestion never sits on the user-facing latency path.
+
+Ordering: messages are stamped (id + create_time) at submit time, and
+within a batch each group's messages are stored sequentially in submit
+order; different groups are stored concurrently.
+
+Each stored message invalidates the cached profile and searches of the
+conversation's user (``user_id``, which for assistant messages differs from
+the sender).  Retrieval caches entries per user, not per group.
+
+Backpressure: when the queue is full, or a single group already has
+``MEMORY_WRITE_MAX_PER_GROUP`` messages pending, new messages are dropped
+(and counted) rather than blocking the turn.
+
+Shutdown: the agent's ADK app closes the writer (:meth:`MessageWriter.aclose`)
+when the server stops, which waits up to ``MEMORY_WRITE_FLUSH_TIMEOUT`` for
+the queue to drain.  Anything left after that -- still queued, or taken by
+the worker but not yet stored -- is stored synchronously by an ``atexit``
+hook.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+
+from . import memory, meta
+
+logger = logging.getLogger(__name__)
+
+WRITE_QUEUE_SIZE = int(os.environ.get("MEMORY_WRITE_QUEUE_SIZE", "1000"))
+# Per-group share of the queue, so one chatty user cannot starve the rest.
+WRITE_MAX_PER_GROUP = int(os.environ.get("MEMORY_WRITE_MAX_PER_GROUP", "100"))
+WRITE_BATCH_SIZE = int(os.environ.get("MEMORY_WRITE_BATCH_SIZE", "20"))
+WRITE_MAX_RETRIES = int(os.environ.get("MEMORY_WRITE_MAX_RETRIES", "3"))
+WRITE_RETRY_BACKOFF = float(os.environ.get("MEMORY_WRITE_RETRY_BACKOFF", "0.5"))
+WRITE_FLUSH_TIMEOUT = float(os.environ.get("MEMORY_WRITE_FLUSH_TIMEOUT", "10"))
+
+
+def is_retryable(exc: Exception) -> bool:
+    """True for errors worth retrying: transport failures, 429 and 5xx.
+
+    Other 4xx responses (a malformed or rejected message) fail the same
+    way every time, so retrying them only delays the rest of the queue.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+@dataclass(frozen=True)
+class PendingMessage:
+    """A message stamped at submit time so retries stay idempotent."""
+
+    group_id: str
+    sender: str
+    content: str
+    role: str
+    sender_name: str | None
+    user_id: str  # the user whose conversation this is (whose caches to invalidate)
+    message_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    create_time: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat()
+    )
+
+
+@dataclass
+class WriterStats:
+    """Counters for the write-behind queue."""
+
+    submitted: int = 0
+    stored: int = 0
+    retried: int = 0  # transport errors, 429 and 5xx only
+    dropped: int = 0  # rejected because the queue was full
+    throttled: int = 0  # rejected because the group hit its per-group cap
+    failed: int = 0  # gave up after WRITE_MAX_RETRIES, or not retryable
+
+
+class MessageWriter:
+    """Bounded write-behind queue with a batching, retrying worker.
+
+    The queue and worker task are bound to the event loop that first calls
+    :meth:`submit`; construction is side-effect free.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = WRITE_QUEUE_SIZE,
+        max_per_group: int = WRITE_MAX_PER_GROUP,
+        batch_size: int = WRITE_BATCH_SIZE,
+        max_retries: int = WRITE_MAX_RETRIES,
+        retry_backoff: float = WRITE_RETRY_BACKOFF,
+    ) -> None:
+        self.maxsize = maxsize
+        self.max_per_group = max_per_group
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.stats = WriterStats()
+        self._queue: asyncio.Queue[PendingMessage] | None = None
+        self._worker: asyncio.Task | None = None
+        # Queued-but-unprocessed count per group; only groups with pending
+        # messages have an entry, so this is bounded by ``maxsize``.
+        self._pending: dict[str, int] = {}
+        # Messages the worker has taken off the queue but not finished with,
+        # by message id; whatever is left here at exit is drained too.
+        self._inflight: dict[str, PendingMessage] = {}
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(
+        self,
+        group_id: str,
+        sender: str,
+        content: str,
+        role: str = "user",
+        sender_name: str | None = None,
+        user_id: str | None = None,
+    ) -> bool:
+        """Queue a message for storage.  Never blocks.
+
+        ``user_id`` is the conversation's user (default: ``sender``).  Must
+        be called from within the running event loop.  Returns False if the
+        message was dropped: the queue is full, or its group already has
+        ``max_per_group`` messages pending.
+        """
+        self._ensure_worker()
+        if self._pending.get(group_id, 0) >= self.max_per_group:
+            self.stats.throttled += 1
+            logger.warning(
+                "Memory write cap (%d) reached for group %s; dropped %s message",
+                self.max_per_group, group_id, role,
+            )
+            return False
+        msg = PendingMessage(
+            group_id, sender, content, role, sender_name, user_id or sender
+        )
+        try:
+            self._queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            self.stats.dropped += 1
+            logger.warning(
+                "Memory write queue full (%d); dropped %s message for group %s",
+                self.maxsize, role, group_id,
+            )
+            return False
+        self.stats.submitted += 1
+        self._pending[group_id] = self._pending.get(group_id, 0) + 1
+        return True
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the counters plus current queue depth."""
+        return {**asdict(self.stats), "depth": self.depth}
+
+    # -- worker --------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(
+                self._run(), name="memory-writer"
+            )
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            for msg in batch:
+                self._inflight[msg.message_id] = msg
+            try:
+                await self._store_batch(batch)
+            finally:
+                for msg in batch:
+                    self._release(msg.group_id)
+                    queue.task_done()
+
+    def _release(self, group_id: str) -> None:
+        remaining = self._pending.get(group_id, 0) - 1
+        if remaining > 0:
+            self._pending[group_id] = remaining
+        else:
+            self._pending.pop(group_id, None)
+
+    async def _store_batch(self, batch: list[PendingMessage]) -> None:
+        by_group: dict[str, list[PendingMessage]] = defaultdict(list)
+        for msg in batch:
+            by_group[msg.group_id].append(msg)
+        await asyncio.gather(
+            *(self._store_group(msgs) for msgs in by_group.values())
+        )
+
+    async def _store_group(self, msgs: list[PendingMessage]) -> None:
+        # Conversation meta for a new group is set up lazily; let it land
+        # before the group's first messages.
+        await meta.get_registry().wait(msgs[0].group_id, memory.EVERMEMOS_TIMEOUT)
+        for msg in msgs:
+            await self._store_with_retry(msg)
+
+    async def _store_with_retry(self, msg: PendingMessage) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await memory.astore_message(
+                    group_id=msg.group_id,
+                    sender=msg.sender,
+                    content=msg.content,
+                    role=msg.role,
+                    sender_name=msg.sender_name,
+                    message_id=msg.message_id,
+                    create_time=msg.create_time,
+                )
+                self.stats.stored += 1
+                self._inflight.pop(msg.message_id, None)
+                memory.invalidate_caches(user_id=msg.user_id)
+                return
+            except Exception as exc:
+                if attempt == self.max_retries or not is_retryable(exc):
+                    self.stats.failed += 1
+                    self._inflight.pop(msg.message_id, None)
+                    logger.warning(
+                        "Failed to store %s message after %d attempts: %s",
+                        msg.role, attempt + 1, exc,
+                    )
+                    return
+                self.stats.retried += 1
+                await asyncio.sleep(self.retry_backoff * 2**attempt)
+
+    # -- shutdown ------------------------------------------------------------
+
+    async def flush(self, timeout: float = WRITE_FLUSH_TIMEOUT) -> bool:
+        """Wait until every queued message has been handled.
+
+        Returns False if the queue did not drain within ``timeout``.
+        """
+        if self._queue is None:
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def aclose(self, timeout: float = WRITE_FLUSH_TIMEOUT) -> None:
+        """Flush, then stop the worker.
+
+        Messages the worker was still storing stay in-flight and are left
+        to :meth:`drain_sync`.
+        """
+        await self.flush(timeout)
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def drain_sync(self) -> None:
+        """Store anything in-flight or still queued using the sync client.
+
+        For interpreter shutdown, when the event loop is no longer running.
+        Messages are attempted once each; in-flight ones may already have
+        been stored, which their message id makes harmless.
+        """
+        if self._queue is None:
+            return
+        leftover = list(self._inflight.values())
+        self._inflight.clear()
+        while not self._queue.empty():
+            msg = self._queue.get_nowait()
+            self._release(msg.group_id)
+            leftover.append(msg)
+        for msg in leftover:
+            try:
+                memory.store_message(
+                    group_id=msg.group_id,
+                    sender=msg.sender,
+                    content=msg.content,
+                    role=msg.role,
+                    sender_name=msg.sender_name,
+                    message_id=msg.message_id,
+                    create_time=msg.create_time,
+                )
+                self.stats.stored += 1
+            except Exception as exc:
+                self.stats.failed += 1
+                logger.warning("Failed to flush %s message: %s", msg.role, exc)
+
+
+_writer = MessageWriter()
+atexit.register(_writer.drain_sync)
+
+
+def get_writer() -> MessageWriter:
+    """Return the process-wide writer."""
+    return _writer
+
+
+def submit(
+    group_id: str,
+    sender: str,
+    content: str,
+    role: str = "user",
+    sender_name: str | None = None,
+    user_id: str | None = None,
+) -> bool:
+    """Queue a message on the process-wide writer.  See :meth:`MessageWriter.submit`."""
+    return _writer.submit(group_id, sender, content, role, sender_name, user_id)
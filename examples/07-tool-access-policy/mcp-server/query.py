@@ -0,0 +1,281 @@
+"""
+Read-only SQL query engine behind execute_query.
+
+Queries run against the SQLite store's own file (STORE_BACKEND=sqlite)
+through read-only connections, so a query can never modify data and
+always sees the live reports and config.
+
+Results are paged, never materialized whole:
+
+  - the query runs exactly as written (no wrapping subquery, no added
+    ORDER BY or LIMIT), so PRAGMA, WITH and commented queries work and
+    SQLite produces rows only as they are read;
+  - rows are fetched in chunks of QUERY_CHUNK_ROWS and reading stops once
+    the page is full (at most ``max_query_rows`` rows);
+  - a page that stops early leaves its cursor open and returns a
+    continuation token naming it; passing the token back resumes that
+    cursor at the next row, so paging through N rows reads each row once.
+    Pages of one cursor come from the same snapshot of the data;
+  - open cursors are kept per process, at most QUERY_OPEN_CURSORS of them
+    and for QUERY_CURSOR_TTL seconds after their last page.  A token whose
+    cursor is gone (expired, evicted, or served by another worker) re-runs
+    the query and skips the rows already returned.  That costs a scan of
+    those rows, and reads the data as it is now: with an ORDER BY the
+    skipped rows are the same if the data did not change; without one,
+    SQLite returns rows in the same order for the same data and query
+    plan, but that order is not guaranteed;
+  - a progress handler aborts any page running past its timeout.
+
+Each open cursor holds a read transaction, which keeps the WAL from being
+checkpointed past it; the cap and TTL bound that.  Connections are reused
+between queries, so repeated queries reuse compiled statements from each
+connection's prepared-statement cache (QUERY_STATEMENT_CACHE entries).
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from store import STORE_PATH
+
+QUERY_CHUNK_ROWS = int(os.environ.get("QUERY_CHUNK_ROWS", "100"))
+QUERY_TIMEOUT = float(os.environ.get("QUERY_TIMEOUT", "10"))
+QUERY_STATEMENT_CACHE = int(os.environ.get("QUERY_STATEMENT_CACHE", "128"))
+QUERY_OPEN_CURSORS = int(os.environ.get("QUERY_OPEN_CURSORS", "16"))
+QUERY_CURSOR_TTL = float(os.environ.get("QUERY_CURSOR_TTL", "60"))
+
+# SQLite VM instructions between timeout checks.
+_PROGRESS_STEPS = 10_000
+# Lower bound for a caller-supplied timeout.
+MIN_QUERY_TIMEOUT = 0.1
+# Idle connections kept for reuse.
+_MAX_IDLE_CONNECTIONS = 8
+
+
+class QueryError(Exception):
+    """The query was rejected, failed, or timed out."""
+
+
+def encode_token(query: str, offset: int, cursor_id: str | None = None) -> str:
+    data: dict = {"q": query, "o": offset}
+    if cursor_id:
+        data["c"] = cursor_id
+    raw = json.dumps(data, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_token(token: str) -> tuple[str, int, str | None]:
+    """Return ``(query, offset, cursor_id)``; ``cursor_id`` may be None."""
+    try:
+        data = json.loads(base64.b64decode(token, altchars=b"-_", validate=True))
+        cursor_id = data.get("c")
+        return str(data["q"]), int(data["o"]), str(cursor_id) if cursor_id else None
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise QueryError("Invalid continuation token") from None
+
+
+@dataclass
+class _OpenCursor:
+    """An unfinished query kept open between pages."""
+
+    conn: sqlite3.Connection
+    cursor: sqlite3.Cursor
+    query: str
+    offset: int  # rows returned so far
+    expires: float
+    # Rows read past the end of the last page (the "is there more" probe).
+    lookahead: list[tuple] = field(default_factory=list)
+
+
+class QueryEngine:
+    """Runs paged, time-limited, read-only queries over reusable connections."""
+
+    def __init__(
+        self,
+        path: str = STORE_PATH,
+        chunk_rows: int = QUERY_CHUNK_ROWS,
+        statement_cache: int = QUERY_STATEMENT_CACHE,
+        open_cursors: int = QUERY_OPEN_CURSORS,
+        cursor_ttl: float = QUERY_CURSOR_TTL,
+    ) -> None:
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.statement_cache = statement_cache
+        self.open_cursors = open_cursors
+        self.cursor_ttl = cursor_ttl
+        self.resumed = 0  # pages served from an open cursor
+        self.restarted = 0  # tokens whose cursor was gone; query re-run
+        self._lock = threading.Lock()
+        self._idle: list[sqlite3.Connection] = []
+        self._open: OrderedDict[str, _OpenCursor] = OrderedDict()
+
+    def stats(self) -> dict:
+        return {
+            "open_cursors": len(self._open),
+            "idle_connections": len(self._idle),
+            "resumed": self.resumed,
+            "restarted": self.restarted,
+        }
+
+    # -- connections and open cursors ----------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        # Used by one thread at a time, but not always the one that opened it.
+        conn = sqlite3.connect(
+            f"file:{self.path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.statement_cache,
+        )
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if len(self._idle) < _MAX_IDLE_CONNECTIONS:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _close(self, open_cursor: _OpenCursor) -> None:
+        open_cursor.cursor.close()
+        self._release(open_cursor.conn)
+
+    def _take(self, cursor_id: str, query: str, offset: int) -> _OpenCursor | None:
+        """Remove and return the open cursor ``cursor_id`` if it is at ``offset``."""
+        now = time.monotonic()
+        with self._lock:
+            found = self._open.pop(cursor_id, None)
+            expired = [k for k, c in self._open.items() if c.expires <= now]
+            stale = [self._open.pop(k) for k in expired]
+        if found is not None and (
+            found.expires <= now or found.query != query or found.offset != offset
+        ):
+            stale.append(found)
+            found = None
+        for open_cursor in stale:
+            self._close(open_cursor)
+        return found
+
+    def _keep(self, open_cursor: _OpenCursor) -> str:
+        """Park ``open_cursor`` for the next page; return its id."""
+        cursor_id = uuid.uuid4().hex
+        open_cursor.expires = time.monotonic() + self.cursor_ttl
+        with self._lock:
+            self._open[cursor_id] = open_cursor
+            evicted = []
+            while len(self._open) > self.open_cursors:
+                evicted.append(self._open.popitem(last=False)[1])
+        for old in evicted:
+            self._close(old)
+        return cursor_id
+
+    # -- queries -------------------------------------------------------------
+
+    def run(
+        self,
+        query: str,
+        offset: int,
+        max_rows: int,
+        timeout: float = QUERY_TIMEOUT,
+        on_chunk: Callable[[int], None] | None = None,
+        cursor_id: str | None = None,
+    ) -> dict:
+        """Return up to ``max_rows`` rows of ``query`` starting at ``offset``.
+
+        ``cursor_id`` (from a continuation token) resumes that open cursor;
+        without one, or if it is gone, the query is run and ``offset`` rows
+        are skipped.  ``on_chunk`` is called with the running row count
+        after each chunk.  ``max_rows`` is raised to at least 1 and
+        ``timeout`` to at least MIN_QUERY_TIMEOUT, so every page makes
+        progress.
+        """
+        query = query.strip().rstrip(";")
+        if not query:
+            raise QueryError("Empty query")
+        max_rows = max(1, max_rows)
+        offset = max(0, offset)
+        timeout = max(MIN_QUERY_TIMEOUT, timeout)
+
+        open_cursor = self._take(cursor_id, query, offset) if cursor_id else None
+        if open_cursor is not None:
+            self.resumed += 1
+        elif cursor_id:
+            self.restarted += 1
+        conn = open_cursor.conn if open_cursor else self._connect()
+        deadline = time.monotonic() + timeout
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, _PROGRESS_STEPS)
+        started = time.monotonic()
+        rows: list[tuple] = []
+        cursor = None
+        try:
+            if open_cursor is not None:
+                cursor = open_cursor.cursor
+                rows.extend(open_cursor.lookahead)
+            else:
+                cursor = conn.execute(query)
+                self._skip(cursor, offset)
+            columns = [d[0] for d in cursor.description or ()]
+            # One extra row tells us whether another page exists.
+            while len(rows) <= max_rows and cursor.description is not None:
+                chunk = cursor.fetchmany(min(self.chunk_rows, max_rows + 1 - len(rows)))
+                if not chunk:
+                    break
+                rows.extend(chunk)
+                if on_chunk is not None:
+                    on_chunk(min(len(rows), max_rows))
+        except BaseException as exc:
+            conn.set_progress_handler(None, 0)
+            if cursor is not None:
+                cursor.close()
+            self._release(conn)
+            if isinstance(exc, sqlite3.OperationalError) and time.monotonic() > deadline:
+                raise QueryError(f"Query timed out after {timeout:g} s") from None
+            if isinstance(exc, sqlite3.Error):
+                raise QueryError(str(exc)) from None
+            raise
+        conn.set_progress_handler(None, 0)
+
+        more = len(rows) > max_rows
+        next_offset = offset + min(len(rows), max_rows)
+        token = None
+        if more:
+            token = encode_token(
+                query,
+                next_offset,
+                self._keep(
+                    _OpenCursor(conn, cursor, query, next_offset, 0.0, rows[max_rows:])
+                ),
+            )
+        else:
+            cursor.close()
+            self._release(conn)
+        rows = rows[:max_rows]
+        return {
+            "query": query,
+            "columns": columns,
+            "rows_returned": len(rows),
+            "results": [dict(zip(columns, row)) for row in rows],
+            "continuation_token": token,
+            "elapsed_ms": round((time.monotonic() - started) * 1000),
+        }
+
+    def _skip(self, cursor: sqlite3.Cursor, rows: int) -> None:
+        """Read and discard the first ``rows`` rows of ``cursor``."""
+        while rows > 0 and cursor.description is not None:
+            chunk = cursor.fetchmany(min(self.chunk_rows, rows))
+            if not chunk:
+                return
+            rows -= len(chunk)
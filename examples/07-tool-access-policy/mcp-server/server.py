@@ -6,76 +6,251 @@ waypoint enforce which callers can invoke which tools. This server simply
 implements the tool logic.
 
 Tools:
-  list_reports   -- list available reports
+  list_reports   -- list available reports (filterable, paginated)
   read_report    -- read a specific report by ID
-  execute_query  -- run an arbitrary query string
-  modify_config  -- change a configuration key/value
+  execute_query  -- run a read-only SQL query, paged (see query.py)
+  modify_config  -- change a configuration key/value (optionally CAS)
+
+Reports and config live in a Store (see store.py): in memory by default,
+or in a SQLite file with STORE_BACKEND=sqlite and STORE_PATH=<file>.
+execute_query runs read-only SQL against that same file, so it needs the
+SQLite store; with the memory store it returns an error.
+
+Run modes (RUN_MODE):
+  dev         -- one process, stateful streamable-HTTP sessions (default).
+  production  -- stateless streamable-HTTP with plain JSON responses,
+                 served by uvicorn with WORKERS processes sharing state
+                 through the SQLite store. On SIGTERM, workers stop
+                 accepting and finish in-flight calls for up to
+                 DRAIN_TIMEOUT seconds. (No SSE streams, so no progress
+                 notifications from execute_query in this mode.)
+
+Tool bodies run in worker threads, each tool with its own concurrency
+limit (TOOL_CONCURRENCY, per process), so a burst of slow execute_query
+calls queues behind its own limit instead of starving list_reports.
 """
 
+import logging
 import os
 
-from mcp.server.fastmcp import FastMCP
+import anyio
+from mcp.server.fastmcp import Context, FastMCP
+
+from query import QUERY_TIMEOUT, QueryEngine, QueryError, decode_token
+from store import SqliteStore, VersionConflict, open_store
 
-mcp = FastMCP("policy-mcp-server")
+logger = logging.getLogger(__name__)
 
-# In-memory sample data -- enough to demonstrate the tools work.
-REPORTS = {
+HOST = os.environ.get("HOST", "127.0.0.1")
+PORT = int(os.environ.get("PORT", "3000"))
+RUN_MODE = os.environ.get("RUN_MODE", "dev")
+WORKERS = int(os.environ.get("WORKERS", "4"))
+DRAIN_TIMEOUT = float(os.environ.get("DRAIN_TIMEOUT", "30"))
+# "tool=limit,..."; tools not listed use DEFAULT_TOOL_CONCURRENCY.
+TOOL_CONCURRENCY = os.environ.get("TOOL_CONCURRENCY", "execute_query=4")
+DEFAULT_TOOL_CONCURRENCY = 32
+
+mcp = FastMCP(
+    "policy-mcp-server",
+    host=HOST,  # non-loopback hosts disable DNS-rebinding host checks
+    port=PORT,
+    stateless_http=RUN_MODE == "production",
+    json_response=RUN_MODE == "production",
+)
+
+# Sample data loaded into an empty store -- enough to demonstrate the tools.
+SEED_REPORTS = {
     "rpt-001": {"title": "Q1 Revenue Summary", "status": "final", "content": "Total revenue: $4.2M (+12% YoY)"},
     "rpt-002": {"title": "Monthly Active Users", "status": "draft", "content": "MAU: 84,300 (March 2026)"},
     "rpt-003": {"title": "Infrastructure Cost Breakdown", "status": "final", "content": "Compute: 62%, Storage: 24%, Network: 14%"},
 }
 
-CONFIG = {
+SEED_CONFIG = {
     "retention_days": "90",
     "max_query_rows": "1000",
     "audit_logging": "true",
 }
 
 
+def seed(store) -> None:
+    """Load the sample reports and config into a fresh store."""
+    if not store.is_empty():
+        return
+    for rid, r in SEED_REPORTS.items():
+        store.put_report(rid, r["title"], r["status"], r["content"])
+    for key, value in SEED_CONFIG.items():
+        store.init_config(key, value)
+
+
+store = open_store()
+seed(store)
+# Queries read the live store; the memory store has no database to query.
+engine = QueryEngine(store.path) if isinstance(store, SqliteStore) else None
+
+DEFAULT_MAX_QUERY_ROWS = 1000
+
+
+def _parse_limits(spec: str) -> dict[str, int]:
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+_tool_limits = _parse_limits(TOOL_CONCURRENCY)
+_limiters: dict[str, anyio.CapacityLimiter] = {}
+
+
+async def run_limited(tool: str, fn, *args):
+    """Run blocking ``fn(*args)`` in a thread under ``tool``'s concurrency limit."""
+    limiter = _limiters.get(tool)
+    if limiter is None:  # created lazily: limiters bind to the running loop
+        limiter = _limiters[tool] = anyio.CapacityLimiter(
+            _tool_limits.get(tool, DEFAULT_TOOL_CONCURRENCY)
+        )
+    return await anyio.to_thread.run_sync(fn, *args, limiter=limiter)
+
+
+def max_query_rows() -> int:
+    """Current ``max_query_rows`` config value (read per call, so updates apply)."""
+    entry = store.get_config("max_query_rows")
+    try:
+        return max(1, int(entry[0]))
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_QUERY_ROWS
+
+
 @mcp.tool()
-def list_reports() -> list[dict]:
-    """List all available reports with their ID, title, and status."""
-    return [
-        {"id": rid, "title": r["title"], "status": r["status"]}
-        for rid, r in REPORTS.items()
-    ]
+async def list_reports(
+    status: str | None = None,
+    title_prefix: str | None = None,
+    cursor: str | None = None,
+    limit: int = 50,
+) -> dict:
+    """List reports with their ID, title, and status.
+
+    Optionally filter by exact status (e.g. "final") and/or a
+    case-insensitive title prefix. Results are ordered by ID; pass the
+    returned next_cursor back to get the following page.
+    """
+    try:
+        reports, next_cursor = await run_limited(
+            "list_reports", store.list_reports, status, title_prefix, cursor, limit
+        )
+    except ValueError as exc:
+        return {"error": str(exc)}
+    return {"reports": reports, "next_cursor": next_cursor}
 
 
 @mcp.tool()
-def read_report(report_id: str) -> dict:
+async def read_report(report_id: str) -> dict:
     """Read a specific report by ID. Returns the full report content."""
-    report = REPORTS.get(report_id)
+    report = await run_limited("read_report", store.get_report, report_id)
     if report is None:
         return {"error": f"Report '{report_id}' not found"}
-    return {"id": report_id, **report}
+    return report
 
 
 @mcp.tool()
-def execute_query(query: str) -> dict:
-    """Execute an arbitrary query string. Returns mock results."""
-    # This is a demo -- real implementation would run against a database.
-    return {
-        "query": query,
-        "rows_returned": 42,
-        "results": [
-            {"id": 1, "value": "sample-row-1"},
-            {"id": 2, "value": "sample-row-2"},
-        ],
-        "note": "Mock results -- replace with real query execution",
-    }
+async def execute_query(
+    ctx: Context,
+    query: str | None = None,
+    continuation_token: str | None = None,
+    limit: int | None = None,
+    timeout_s: float | None = None,
+) -> dict:
+    """Execute a read-only SQL query (SQLite dialect), e.g. against the reports table.
+
+    Returns at most max_query_rows rows (or `limit`, if smaller; at least one). If more
+    rows remain, the result has a continuation_token; call again with only
+    that token to get the next page. Queries are aborted after timeout_s
+    seconds (capped by the server's QUERY_TIMEOUT).
+    """
+    if engine is None:
+        return {"error": "execute_query needs the SQLite store (STORE_BACKEND=sqlite)"}
+    offset, cursor_id = 0, None
+    if continuation_token:
+        try:
+            query, offset, cursor_id = decode_token(continuation_token)
+        except QueryError as exc:
+            return {"error": str(exc)}
+    if not query:
+        return {"error": "Provide a query or a continuation_token"}
+    configured = await run_limited("execute_query", max_query_rows)
+    max_rows = max(1, min(limit or configured, configured))
+    timeout = min(timeout_s or QUERY_TIMEOUT, QUERY_TIMEOUT)
+    if timeout <= 0:
+        timeout = QUERY_TIMEOUT
+
+    def on_chunk(rows: int) -> None:
+        anyio.from_thread.run(ctx.report_progress, rows, max_rows)
+
+    try:
+        return await run_limited(
+            "execute_query",
+            engine.run,
+            query,
+            offset,
+            max_rows,
+            timeout,
+            on_chunk,
+            cursor_id,
+        )
+    except QueryError as exc:
+        return {"query": query, "error": str(exc)}
 
 
 @mcp.tool()
-def modify_config(key: str, value: str) -> dict:
-    """Modify a system configuration key. Returns the previous and new values."""
-    previous = CONFIG.get(key)
-    if previous is None:
-        return {"error": f"Unknown config key '{key}'", "valid_keys": list(CONFIG.keys())}
-    CONFIG[key] = value
-    return {"key": key, "previous_value": previous, "new_value": value}
+async def modify_config(key: str, value: str, expected_version: int | None = None) -> dict:
+    """Modify a system configuration key. Returns the previous and new values.
+
+    Each key has a version that increases on every change. Pass
+    expected_version to apply the change only if nobody else changed the key
+    since you read that version (compare-and-set).
+    """
+    try:
+        previous, version = await run_limited(
+            "modify_config", store.set_config, key, value, expected_version
+        )
+    except KeyError:
+        return {"error": f"Unknown config key '{key}'", "valid_keys": store.config_keys()}
+    except VersionConflict as exc:
+        return {
+            "error": str(exc),
+            "current_value": exc.value,
+            "current_version": exc.version,
+        }
+    return {"key": key, "previous_value": previous, "new_value": value, "version": version}
+
+
+def run_production() -> None:
+    """Serve stateless streamable HTTP from WORKERS uvicorn processes."""
+    import uvicorn
+
+    if WORKERS > 1 and not isinstance(store, SqliteStore):
+        raise SystemExit(
+            "RUN_MODE=production with WORKERS > 1 needs STORE_BACKEND=sqlite "
+            "so that workers share state"
+        )
+    logger.info("Starting %d workers on %s:%d", WORKERS, HOST, PORT)
+    uvicorn.run(
+        "server:app",
+        factory=True,
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        timeout_graceful_shutdown=DRAIN_TIMEOUT,
+    )
+
+
+def app():
+    """ASGI app factory used by each production worker."""
+    return mcp.streamable_http_app()
 
 
 if __name__ == "__main__":
-    host = os.environ.get("HOST", "127.0.0.1")
-    port = int(os.environ.get("PORT", "3000"))
-    mcp.run(transport="streamable-http", host=host, port=port, path="/mcp")
+    if RUN_MODE == "production":
+        run_production()
+    else:
+        mcp.run(transport="streamable-http", host=HOST, port=PORT, path="/mcp")
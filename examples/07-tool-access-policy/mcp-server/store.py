@@ -0,0 +1,330 @@
+"""
+Data store behind the policy MCP server.
+
+Two interchangeable backends implement :class:`Store`:
+
+  MemoryStore  -- process-local dicts plus sorted secondary indexes.
+  SqliteStore  -- a SQLite file (WAL mode), shareable between processes.
+
+Both provide:
+
+  - reports with secondary indexes by status and by title prefix
+    (case-insensitive), listed in report-ID order with opaque cursors;
+  - a versioned CONFIG: every key carries a version that increments on
+    each write, and ``set_config(..., expected_version=n)`` only applies if
+    the key is still at version ``n`` (compare-and-set).
+
+Every method is synchronous and safe to call from several threads; async
+callers run them in a worker thread.
+
+Selected with STORE_BACKEND ("memory" or "sqlite") and STORE_PATH.
+"""
+
+from __future__ import annotations
+
+import base64
+import bisect
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+STORE_BACKEND = os.environ.get("STORE_BACKEND", "memory")
+STORE_PATH = os.environ.get("STORE_PATH", "policy.db")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class VersionConflict(Exception):
+    """A compare-and-set found the config key at a different version."""
+
+    def __init__(self, key: str, value: str, version: int) -> None:
+        super().__init__(f"Config key '{key}' is at version {version}")
+        self.key = key
+        self.value = value
+        self.version = version
+
+
+def encode_cursor(report_id: str) -> str:
+    return base64.urlsafe_b64encode(report_id.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor, altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor '{cursor}'") from None
+
+
+def _page(limit: int | None) -> int:
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def _summary(report_id: str, report: dict) -> dict:
+    return {"id": report_id, "title": report["title"], "status": report["status"]}
+
+
+class Store(ABC):
+    """Reports plus versioned config."""
+
+    @abstractmethod
+    def put_report(self, report_id: str, title: str, status: str, content: str) -> None:
+        """Insert or replace a report."""
+
+    @abstractmethod
+    def get_report(self, report_id: str) -> dict | None:
+        """Return ``{"id", "title", "status", "content"}`` or None."""
+
+    @abstractmethod
+    def list_reports(
+        self,
+        status: str | None = None,
+        title_prefix: str | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """Return one page of report summaries and the cursor of the next."""
+
+    @abstractmethod
+    def get_config(self, key: str) -> tuple[str, int] | None:
+        """Return ``(value, version)`` for ``key``, or None if unknown."""
+
+    @abstractmethod
+    def config_keys(self) -> list[str]:
+        """Return all config keys."""
+
+    @abstractmethod
+    def set_config(
+        self, key: str, value: str, expected_version: int | None = None
+    ) -> tuple[str, int]:
+        """Update an existing key; return ``(previous_value, new_version)``.
+
+        Raises KeyError for unknown keys and :class:`VersionConflict` if
+        ``expected_version`` is given and does not match.
+        """
+
+    @abstractmethod
+    def init_config(self, key: str, value: str) -> None:
+        """Create ``key`` at version 1 unless it already exists."""
+
+    def is_empty(self) -> bool:
+        return not self.list_reports(limit=1)[0] and not self.config_keys()
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryStore(Store):
+    """In-process store; one lock guards data and indexes together."""
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._reports: dict[str, dict] = {}
+        self._ids: list[str] = []  # sorted
+        self._by_status: dict[str, list[str]] = {}  # status -> sorted ids
+        self._by_title: list[tuple[str, str]] = []  # sorted (title.lower(), id)
+        self._config: dict[str, tuple[str, int]] = {}
+
+    def put_report(self, report_id: str, title: str, status: str, content: str) -> None:
+        with self._lock:
+            old = self._reports.get(report_id)
+            if old is not None:
+                self._by_status[old["status"]].remove(report_id)
+                self._by_title.remove((old["title"].lower(), report_id))
+            else:
+                bisect.insort(self._ids, report_id)
+            self._reports[report_id] = {"title": title, "status": status, "content": content}
+            bisect.insort(self._by_status.setdefault(status, []), report_id)
+            bisect.insort(self._by_title, (title.lower(), report_id))
+
+    def get_report(self, report_id: str) -> dict | None:
+        with self._lock:
+            report = self._reports.get(report_id)
+            return None if report is None else {"id": report_id, **report}
+
+    def list_reports(
+        self,
+        status: str | None = None,
+        title_prefix: str | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[dict], str | None]:
+        limit = _page(limit)
+        after = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            ids = self._ids if status is None else self._by_status.get(status, [])
+            if title_prefix:
+                prefix = title_prefix.lower()
+                start = bisect.bisect_left(self._by_title, (prefix, ""))
+                matched = set()
+                for title, report_id in self._by_title[start:]:
+                    if not title.startswith(prefix):
+                        break
+                    matched.add(report_id)
+                if status is not None:
+                    matched = {i for i in matched if self._reports[i]["status"] == status}
+                ids = sorted(matched)
+            start = bisect.bisect_right(ids, after) if after is not None else 0
+            page = ids[start : start + limit + 1]
+            items = [_summary(i, self._reports[i]) for i in page[:limit]]
+        next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+        return items, next_cursor
+
+    def get_config(self, key: str) -> tuple[str, int] | None:
+        with self._lock:
+            return self._config.get(key)
+
+    def config_keys(self) -> list[str]:
+        with self._lock:
+            return list(self._config)
+
+    def set_config(
+        self, key: str, value: str, expected_version: int | None = None
+    ) -> tuple[str, int]:
+        with self._lock:
+            current = self._config.get(key)
+            if current is None:
+                raise KeyError(key)
+            previous, version = current
+            if expected_version is not None and expected_version != version:
+                raise VersionConflict(key, previous, version)
+            self._config[key] = (value, version + 1)
+            return previous, version + 1
+
+    def init_config(self, key: str, value: str) -> None:
+        with self._lock:
+            self._config.setdefault(key, (value, 1))
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id          TEXT PRIMARY KEY,
+    title       TEXT NOT NULL,
+    title_lower TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    content     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_status ON reports (status, id);
+CREATE INDEX IF NOT EXISTS reports_title ON reports (title_lower, id);
+CREATE TABLE IF NOT EXISTS config (
+    key     TEXT PRIMARY KEY,
+    value   TEXT NOT NULL,
+    version INTEGER NOT NULL
+);
+"""
+
+
+class SqliteStore(Store):
+    """File-backed store; one connection per thread, WAL for concurrent readers.
+
+    Several processes may open the same file: compare-and-set runs in an
+    IMMEDIATE transaction, so it is atomic across processes too.
+    """
+
+    def __init__(self, path: str = STORE_PATH) -> None:
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def put_report(self, report_id: str, title: str, status: str, content: str) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)",
+            (report_id, title, title.lower(), status, content),
+        )
+
+    def get_report(self, report_id: str) -> dict | None:
+        row = self._conn().execute(
+            "SELECT id, title, status, content FROM reports WHERE id = ?", (report_id,)
+        ).fetchone()
+        return None if row is None else dict(row)
+
+    def list_reports(
+        self,
+        status: str | None = None,
+        title_prefix: str | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[dict], str | None]:
+        limit = _page(limit)
+        where, args = [], []
+        if status is not None:
+            where.append("status = ?")
+            args.append(status)
+        if title_prefix:
+            prefix = title_prefix.lower()
+            # Range scan on the index instead of LIKE (which it cannot use).
+            where.append("title_lower >= ? AND title_lower < ?")
+            args += [prefix, prefix + "\U0010ffff"]
+        if cursor:
+            where.append("id > ?")
+            args.append(decode_cursor(cursor))
+        sql = "SELECT id, title, status FROM reports"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id LIMIT ?"
+        rows = self._conn().execute(sql, (*args, limit + 1)).fetchall()
+        items = [dict(r) for r in rows[:limit]]
+        next_cursor = encode_cursor(items[-1]["id"]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def get_config(self, key: str) -> tuple[str, int] | None:
+        row = self._conn().execute(
+            "SELECT value, version FROM config WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else (row["value"], row["version"])
+
+    def config_keys(self) -> list[str]:
+        return [r["key"] for r in self._conn().execute("SELECT key FROM config ORDER BY key")]
+
+    def set_config(
+        self, key: str, value: str, expected_version: int | None = None
+    ) -> tuple[str, int]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = self.get_config(key)
+            if current is None:
+                raise KeyError(key)
+            previous, version = current
+            if expected_version is not None and expected_version != version:
+                raise VersionConflict(key, previous, version)
+            conn.execute(
+                "UPDATE config SET value = ?, version = ? WHERE key = ?",
+                (value, version + 1, key),
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return previous, version + 1
+
+    def init_config(self, key: str, value: str) -> None:
+        self._conn().execute(
+            "INSERT OR IGNORE INTO config VALUES (?, ?, 1)", (key, value)
+        )
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def open_store(backend: str = STORE_BACKEND, path: str = STORE_PATH) -> Store:
+    if backend == "memory":
+        return MemoryStore()
+    if backend == "sqlite":
+        return SqliteStore(path)
+    raise ValueError(f"Unknown STORE_BACKEND '{backend}' (expected memory or sqlite)")
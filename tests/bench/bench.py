@@ -0,0 +1,402 @@
+"""Latency / throughput benchmark for the Python agent hot paths.
+
+Starts the fakes from ``fakes.py`` as subprocesses, then drives:
+
+  memory  -- one personal-assistant turn per operation:
+             before_agent_callback, before_model_callback and
+             after_model_callback, spread over --users users.
+  mcp     -- mcp_deployer.tools.call_mcp_tool against the fake MCP server,
+             with every --list-every'th operation a list_server_tools
+             (refresh=True) instead.
+  registry -- mcp_deployer.tools.search_catalog plus a deploy_server of
+             one of --servers stdio servers (Zipf-skewed popularity)
+             through the warm pool, against the fake AgentRegistry.
+
+Operations run at --concurrency for --requests operations (after --warmup).
+The report has p50/p95/p99 latency per operation, throughput, error count
+and memory (peak RSS; peak Python heap with --tracemalloc), and is written
+as JSON to --out.  ``--compare old.json`` prints the change per metric.
+
+  python bench.py memory --concurrency 32 --requests 2000 --latency-ms 20
+  python bench.py mcp --payload-bytes 65536 --out results/mcp.json
+  python bench.py registry --latency-ms 200 --servers 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from types import SimpleNamespace
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent.parent
+PACKAGES = {
+    "memory": ROOT / "examples/06-memory-personal-assistant/agent",
+    "mcp": ROOT / "examples/02-dynamic-mcp/agent",
+    "registry": ROOT / "examples/02-dynamic-mcp/agent",
+}
+FAKES = {"memory": "evermemos", "mcp": "mcp", "registry": "registry"}
+
+MESSAGES = [
+    "What did I say about my trip to Lisbon?",
+    "Remind me which coffee I like.",
+    "Can you help me plan dinner for Friday?",
+    "What are my goals for this quarter?",
+    "Summarize what we talked about last week.",
+]
+CATALOG_QUERIES = "weather github issues postgres search browser calendar jira logs".split()
+
+
+# -- Fakes -------------------------------------------------------------------
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake(kind: str, port: int, args: argparse.Namespace) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            str(HERE / "fakes.py"),
+            kind,
+            f"--port={port}",
+            f"--latency-ms={args.latency_ms}",
+            f"--jitter-ms={args.jitter_ms}",
+            f"--error-rate={args.error_rate}",
+            f"--payload-bytes={args.payload_bytes}",
+        ]
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"fake {kind} exited with {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit(f"fake {kind} did not start on port {port}")
+
+
+# -- Scenarios ---------------------------------------------------------------
+
+Operation = Callable[[int], Awaitable[dict[str, float]]]
+
+
+def memory_scenario(args: argparse.Namespace, port: int) -> tuple[Operation, Callable]:
+    """Return (operation, teardown) for one assistant turn per call."""
+    os.environ["EVERMEMOS_URL"] = f"http://127.0.0.1:{port}"
+    if args.prefetch:
+        os.environ["MEMORY_PREFETCH"] = "true"
+    sys.path.insert(0, str(PACKAGES["memory"]))
+    from google.adk.models.llm_request import LlmRequest
+    from google.adk.models.llm_response import LlmResponse
+    from google.genai import types
+    from personal_assistant import agent, memory, writer
+
+    def content(role: str, text: str) -> types.Content:
+        return types.Content(role=role, parts=[types.Part(text=text)])
+
+    async def turn(i: int) -> dict[str, float]:
+        user = f"user-{i % args.users}"
+        message = random.choice(MESSAGES)
+        ctx = SimpleNamespace(
+            state={},
+            user_id=user,
+            session=SimpleNamespace(id=f"session-{user}"),
+            user_content=content("user", message),
+        )
+        request = LlmRequest(contents=[content("user", message)])
+        response = LlmResponse(content=content("model", "Sure -- " + message))
+
+        t0 = time.perf_counter()
+        await agent.before_agent_callback(ctx)
+        t1 = time.perf_counter()
+        await agent.before_model_callback(ctx, request)
+        t2 = time.perf_counter()
+        await agent.after_model_callback(ctx, response)
+        t3 = time.perf_counter()
+        return {
+            "before_agent": t1 - t0,
+            "before_model": t2 - t1,
+            "after_model": t3 - t2,
+            "turn": t3 - t0,
+        }
+
+    async def teardown() -> dict:
+        started = time.perf_counter()
+        await writer.get_writer().flush()
+        return {
+            "writer_flush_s": round(time.perf_counter() - started, 4),
+            "writer": vars(writer.get_writer().stats),
+            "profile_cache": memory.profile_cache().snapshot(),
+            "query_cache": memory.query_cache().snapshot(),
+        }
+
+    return turn, teardown
+
+
+def mcp_scenario(args: argparse.Namespace, port: int) -> tuple[Operation, Callable]:
+    """Return (operation, teardown) for one MCP tool call per call."""
+    sys.path.insert(0, str(PACKAGES["mcp"]))
+    from mcp_deployer import tools
+
+    url = f"http://127.0.0.1:{port}/mcp"
+
+    async def call(i: int) -> dict[str, float]:
+        started = time.perf_counter()
+        if args.list_every and i % args.list_every == 0:
+            out = await tools.list_server_tools(url=url, refresh=True)
+            name = "list_server_tools"
+        else:
+            out = await tools.call_mcp_tool("payload", {}, url=url)
+            name = "call_mcp_tool"
+        elapsed = time.perf_counter() - started
+        if '"error"' in out[:200] or "injected failure" in out:
+            raise RuntimeError(out[:200])
+        return {name: elapsed}
+
+    async def teardown() -> dict:
+        stats = {"sessions": tools.get_pool().stats()}
+        await tools.get_pool().aclose()
+        return stats
+
+    return call, teardown
+
+
+def registry_scenario(args: argparse.Namespace, port: int) -> tuple[Operation, Callable]:
+    """Return (operation, teardown) for one search + deploy per call."""
+    os.environ["REGISTRY_API_URL"] = f"http://127.0.0.1:{port}"
+    sys.path.insert(0, str(PACKAGES["registry"]))
+    from mcp_deployer import registry, tools, warmpool
+
+    # The fake registry's own endpoint stands in for every deployed server.
+    url = f"http://127.0.0.1:{port}/mcp"
+    backend = warmpool.RegistryBackend(url, server_url=lambda name: url)
+    warmpool._pool = warmpool.WarmPool(backend)
+    servers = [f"io.example/server-{i}" for i in range(args.servers)]
+    weights = [1 / (rank + 1) for rank in range(args.servers)]
+    queries = [" ".join(random.sample(CATALOG_QUERIES, 2)) for _ in range(64)]
+
+    async def call(i: int) -> dict[str, float]:
+        started = time.perf_counter()
+        out = await tools.search_catalog(queries[i % len(queries)], limit=5)
+        searched = time.perf_counter()
+        if '"error"' in out[:200]:
+            raise RuntimeError(out[:200])
+        name = random.choices(servers, weights)[0]
+        deployed = json.loads(await tools.deploy_server(name))
+        elapsed = time.perf_counter() - searched
+        if "error" in deployed:
+            raise RuntimeError(deployed["error"])
+        kind = "deploy_server.warm" if deployed["warm"] else "deploy_server.cold"
+        return {"search_catalog": searched - started, kind: elapsed}
+
+    async def teardown() -> dict:
+        stats = {
+            "warm_pool": warmpool.get_warm_pool().snapshot(),
+            "catalog": registry.get_registry_catalog().stats(),
+        }
+        await warmpool.get_warm_pool().aclose()
+        await tools.get_pool().aclose()
+        return stats
+
+    return call, teardown
+
+
+SCENARIOS = {
+    "memory": memory_scenario,
+    "mcp": mcp_scenario,
+    "registry": registry_scenario,
+}
+
+
+# -- Driver ------------------------------------------------------------------
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def drive(operation: Operation, total: int, concurrency: int, offset: int = 0):
+    """Run ``total`` operations with at most ``concurrency`` in flight."""
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: list[str] = []
+    counter = iter(range(offset, offset + total))
+
+    async def worker() -> None:
+        for i in counter:
+            try:
+                for name, seconds in (await operation(i)).items():
+                    samples[name].append(seconds)
+            except Exception as exc:
+                errors.append(str(exc)[:200])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, errors, time.perf_counter() - started
+
+
+def summarize(samples: dict[str, list[float]]) -> dict[str, dict[str, float]]:
+    out = {}
+    for name, values in samples.items():
+        ordered = sorted(values)
+        out[name] = {
+            "count": len(ordered),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+    return out
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    port = free_port()
+    fake = start_fake(FAKES[args.scenario], port, args)
+    try:
+        operation, teardown = SCENARIOS[args.scenario](args, port)
+        if args.warmup:
+            await drive(operation, args.warmup, args.concurrency)
+        if args.tracemalloc:
+            tracemalloc.start()
+        samples, errors, elapsed = await drive(
+            operation, args.requests, args.concurrency, offset=args.warmup
+        )
+        heap_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+        tracemalloc.stop()
+        extra = await teardown()
+    finally:
+        fake.terminate()
+        fake.wait()
+
+    done = args.requests - len(errors)
+    return {
+        "scenario": args.scenario,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            k: v for k, v in vars(args).items() if k not in ("out", "compare")
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ops_s": round(done / elapsed, 2) if elapsed else 0.0,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "latency": summarize(samples),
+        "memory": {
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_heap_mb": round(heap_peak / 2**20, 2) if heap_peak else None,
+        },
+        "details": extra,
+    }
+
+
+def compare(new: dict, old: dict) -> list[str]:
+    """One line per metric that exists in both results."""
+    lines = []
+
+    def row(label: str, a: float | None, b: float | None) -> None:
+        if a is None or b is None:
+            return
+        change = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+        lines.append(f"  {label:<40} {a:>12} -> {b:<12} {change}")
+
+    row("throughput_ops_s", old.get("throughput_ops_s"), new.get("throughput_ops_s"))
+    row("errors", old.get("errors"), new.get("errors"))
+    for op, stats in new.get("latency", {}).items():
+        before = old.get("latency", {}).get(op, {})
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            row(f"{op}.{key}", before.get(key), stats.get(key))
+    row(
+        "peak_rss_mb",
+        old.get("memory", {}).get("peak_rss_mb"),
+        new.get("memory", {}).get("peak_rss_mb"),
+    )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=2048)
+    parser.add_argument("--users", type=int, default=100, help="memory: distinct users")
+    parser.add_argument("--prefetch", action="store_true", help="memory: MEMORY_PREFETCH")
+    parser.add_argument(
+        "--list-every", type=int, default=10, help="mcp: every Nth op lists tools (0: never)"
+    )
+    parser.add_argument(
+        "--servers", type=int, default=20, help="registry: distinct servers deployed"
+    )
+    parser.add_argument("--tracemalloc", action="store_true", help="track peak Python heap")
+    parser.add_argument("--out", help="result file (default results/<scenario>-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    out = Path(args.out or HERE / "results" / f"{args.scenario}-{int(time.time())}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2) + "\n")
+
+    print(f"{result['scenario']}: {result['throughput_ops_s']} ops/s, {result['errors']} errors")
+    for op, stats in result["latency"].items():
+        print(
+            f"  {op:<18} p50 {stats['p50_ms']:>9} ms  p95 {stats['p95_ms']:>9} ms"
+            f"  p99 {stats['p99_ms']:>9} ms"
+        )
+    print(f"  peak RSS {result['memory']['peak_rss_mb']} MB -> {out}")
+    if args.compare:
+        print(f"compared with {args.compare}:")
+        print("\n".join(compare(result, json.loads(Path(args.compare).read_text()))))
+
+
+if __name__ == "__main__":
+    main()
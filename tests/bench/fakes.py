@@ -0,0 +1,252 @@
+"""Local stand-ins for EverMemOS, an MCP server and AgentRegistry, with faults.
+
+Each fake is a small ASGI app served by uvicorn.  Every request sleeps
+``latency_ms`` (+/- ``jitter_ms``), fails with probability ``error_rate``,
+and returns roughly ``payload_bytes`` of content.
+
+  python fakes.py evermemos --port 8001 --latency-ms 20 --payload-bytes 4096
+  python fakes.py mcp       --port 3001 --latency-ms 50 --error-rate 0.01
+  python fakes.py registry  --port 8080 --latency-ms 200
+
+EverMemOS errors are HTTP 500s.  MCP errors are tool errors
+(``isError: true``) -- a transport-level 500 would leave the MCP client
+waiting for a response until its read timeout.
+
+The registry fake serves a generated catalog of ``CATALOG_SIZE`` servers
+on ``GET /v0/servers`` (cursor paging, ``updated_since``) and the
+``deploy_server`` / ``remove_deployment`` / ``list_deployments`` MCP tools
+on ``/mcp``.  Its own ``/mcp`` endpoint also answers readiness probes, so
+it can stand in for the deployed servers.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+
+import uvicorn
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    payload_bytes: int = 1024
+
+    async def delay(self) -> None:
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms)
+        delay = max(0.0, self.latency_ms + jitter) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+
+    def fail(self) -> bool:
+        return random.random() < self.error_rate
+
+    def text(self, size: int | None = None) -> str:
+        size = self.payload_bytes if size is None else size
+        words = "lorem ipsum dolor sit amet consectetur adipiscing elit ".split()
+        out, n = [], 0
+        while n < size:
+            word = random.choice(words)
+            out.append(word)
+            n += len(word) + 1
+        return " ".join(out)[:size]
+
+
+# -- EverMemOS ---------------------------------------------------------------
+
+
+def evermemos_app(faults: Faults):
+    """ASGI app answering the four EverMemOS endpoints the assistant uses."""
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    # Search returns a handful of memories sharing the payload budget.
+    per_memory = max(64, faults.payload_bytes // 5)
+
+    async def handle(request: Request) -> JSONResponse:
+        await faults.delay()
+        if faults.fail():
+            return JSONResponse({"error": "injected failure"}, status_code=500)
+        path = request.url.path
+        if path.endswith("/search"):
+            memories = [
+                {
+                    "memory_type": "episodic_memory",
+                    "content": faults.text(per_memory),
+                    "score": round(random.random(), 3),
+                    "timestamp": f"2026-01-{i + 1:02d}T00:00:00Z",
+                }
+                for i in range(5)
+            ]
+            return JSONResponse({"data": {"memories": memories}})
+        if path == "/api/v1/memories" and request.method == "GET":
+            profile = {"memory_type": "profile", "content": faults.text(per_memory)}
+            return JSONResponse({"data": {"memories": [profile]}})
+        return JSONResponse({"status": "ok"})
+
+    methods = ["GET", "POST"]
+    return Starlette(
+        routes=[
+            Route("/api/v1/memories", handle, methods=methods),
+            Route("/api/v1/memories/search", handle, methods=methods),
+            Route("/api/v1/memories/conversation-meta", handle, methods=methods),
+        ]
+    )
+
+
+# -- MCP ---------------------------------------------------------------------
+
+
+def mcp_app(faults: Faults):
+    """Streamable-HTTP MCP app with ``echo`` and ``payload`` tools."""
+    from mcp.server.fastmcp import FastMCP
+
+    server = FastMCP("bench-fake", log_level="WARNING")
+
+    @server.tool()
+    async def echo(text: str) -> str:
+        """Echo the text back."""
+        await faults.delay()
+        if faults.fail():
+            raise RuntimeError("injected failure")
+        return text
+
+    @server.tool()
+    async def payload(size: int | None = None) -> str:
+        """Return ``size`` bytes of text (default: the configured payload)."""
+        await faults.delay()
+        if faults.fail():
+            raise RuntimeError("injected failure")
+        return faults.text(size)
+
+    return server.streamable_http_app()
+
+
+# -- AgentRegistry -----------------------------------------------------------
+
+CATALOG_SIZE = 500
+CATALOG_WORDS = (
+    "weather github issues slack postgres database files search web browser "
+    "maps calendar email jira notion kubernetes docker metrics logs tickets"
+).split()
+
+
+def fake_catalog(size: int = CATALOG_SIZE) -> list[dict]:
+    """Deterministic registry listing items; every other server is remote."""
+    rng = random.Random(0)
+    items = []
+    for i in range(size):
+        words = rng.sample(CATALOG_WORDS, 3)
+        server: dict = {
+            "name": f"io.example/{words[0]}-{i}",
+            "version": "1.0.0",
+            "description": f"MCP server for {' '.join(words)} tasks",
+        }
+        if i % 2:
+            server["packages"] = [
+                {
+                    "registryType": "npm",
+                    "identifier": f"@example/{words[0]}-{i}",
+                    "environmentVariables": [{"name": "API_KEY", "isRequired": True}],
+                }
+            ]
+        else:
+            server["remotes"] = [
+                {"type": "streamable-http", "url": f"https://{words[0]}-{i}.example/mcp"}
+            ]
+        meta = {"status": "active", "updatedAt": "2026-01-01T00:00:00Z", "isLatest": True}
+        items.append(
+            {"server": server, "_meta": {"io.modelcontextprotocol.registry/official": meta}}
+        )
+    return items
+
+
+def registry_app(faults: Faults):
+    """REST catalog listing plus the registry's deploy MCP tools."""
+    from mcp.server.fastmcp import FastMCP
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    catalog = fake_catalog()
+    deployments: dict[str, str] = {}  # name -> version
+    server = FastMCP("bench-registry", log_level="WARNING")
+
+    @server.tool()
+    async def deploy_server(
+        serverName: str,
+        version: str = "latest",
+        runtime: str = "local",
+        config: dict | None = None,
+    ) -> str:
+        """Record a deployment of ``serverName``."""
+        await faults.delay()
+        if faults.fail():
+            raise RuntimeError("injected failure")
+        deployments[serverName] = version
+        return f"Deployed {serverName}@{version} ({runtime})"
+
+    @server.tool()
+    async def remove_deployment(serverName: str, version: str = "latest") -> str:
+        """Remove the deployment of ``serverName``."""
+        if deployments.pop(serverName, None) is None:
+            raise RuntimeError(f"{serverName} is not deployed")
+        return f"Removed {serverName}"
+
+    @server.tool()
+    async def list_deployments() -> dict[str, str]:
+        """Deployed servers and their versions."""
+        return deployments
+
+    async def list_servers(request: Request) -> JSONResponse:
+        since = request.query_params.get("updated_since", "")
+        limit = int(request.query_params.get("limit", "30"))
+        start = int(request.query_params.get("cursor") or 0)
+        items = [
+            item
+            for item in catalog
+            if item["_meta"]["io.modelcontextprotocol.registry/official"]["updatedAt"]
+            > since
+        ]
+        page = items[start : start + limit]
+        more = start + limit < len(items)
+        return JSONResponse(
+            {
+                "servers": page,
+                "metadata": {"nextCursor": str(start + limit) if more else None},
+            }
+        )
+
+    app = server.streamable_http_app()
+    app.router.routes.append(Route("/v0/servers", list_servers))
+    return app
+
+
+APPS = {"evermemos": evermemos_app, "mcp": mcp_app, "registry": registry_app}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=sorted(APPS))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-bytes", type=int, default=1024)
+    args = parser.parse_args()
+
+    faults = Faults(args.latency_ms, args.jitter_ms, args.error_rate, args.payload_bytes)
+    uvicorn.run(
+        APPS[args.kind](faults), host=args.host, port=args.port, log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()